@@ -0,0 +1,73 @@
+"""Static image assets for United Union Bank.
+
+The logo used to be located, decoded and resized on every rerun of every
+session.  ``LogoAssets`` does that once per process: it finds the logo file,
+pre-renders each display size to encoded bytes and serves them from memory.
+"""
+import io
+import os
+import threading
+import time
+
+from PIL import Image
+
+LOGO_CANDIDATES = ("logo.jpeg", "logo.png", "logo.jpg")
+LOGO_SIZES = (80, 100)
+
+
+def find_logo(candidates=LOGO_CANDIDATES):
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def render(image, size, fmt="PNG"):
+    buffer = io.BytesIO()
+    image.resize((size, size)).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class LogoAssets:
+    """Pre-rendered logo bytes keyed by pixel size.
+
+    ``get`` returns None when there is no usable logo so callers can fall back
+    to the emoji.  ``load_ms`` is the one-off cost paid at startup and
+    ``render_ms`` the per-render decode + resize cost it replaces.
+    """
+
+    def __init__(self, sizes=LOGO_SIZES, fmt="PNG", candidates=LOGO_CANDIDATES):
+        self.fmt = fmt
+        self.path = find_logo(candidates)
+        self._image = None
+        self._rendered = {}
+        self._lock = threading.Lock()
+        self.load_ms = 0.0
+        self.render_ms = 0.0
+        if self.path is None:
+            return
+        started = time.perf_counter()
+        try:
+            with Image.open(self.path) as image:
+                self._image = image.convert("RGBA" if fmt == "PNG" else "RGB")
+        except OSError:
+            return
+        decoded = time.perf_counter()
+        for size in sizes:
+            self._rendered[size] = render(self._image, size, fmt)
+        finished = time.perf_counter()
+        self.load_ms = (finished - started) * 1000
+        self.render_ms = ((decoded - started) * 1000
+                          + (finished - decoded) * 1000 / max(len(sizes), 1))
+
+    def get(self, size):
+        if self._image is None:
+            return None
+        data = self._rendered.get(size)
+        if data is None:
+            # Sizes not pre-rendered at startup are rendered once on first use
+            with self._lock:
+                data = self._rendered.get(size)
+                if data is None:
+                    data = self._rendered[size] = render(self._image, size, self.fmt)
+        return data
@@ -0,0 +1,63 @@
+"""Password hashing service for United Union Bank.
+
+bcrypt is deliberately slow.  Running it inline in every Streamlit script
+thread lets a burst of logins occupy every core and stall page renders for
+all other sessions.  ``PasswordHasher`` runs hashing and verification on a
+bounded thread pool (bcrypt releases the GIL), picks its cost factor by
+timing bcrypt on this machine, and reports when a stored hash was made with
+an outdated cost so the caller can rehash it on a successful login.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+# The cost of bcrypt.gensalt()'s default, used by every hash made before
+# calibration; a slow machine must not hash with less work than that
+MIN_ROUNDS = 12
+MAX_ROUNDS = 14
+TARGET_MS = 250
+
+
+def calibrate(target_ms=TARGET_MS, min_rounds=MIN_ROUNDS, max_rounds=MAX_ROUNDS):
+    """Highest bcrypt cost whose hash time stays within ``target_ms``."""
+    # Each extra round doubles the work, so one timing predicts the rest
+    started = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(min_rounds))
+    base_ms = (time.perf_counter() - started) * 1000
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+    return rounds
+
+
+def hash_rounds(hashed):
+    """Cost factor encoded in a bcrypt hash ($2b$12$...)."""
+    return int(hashed[4:6])
+
+
+class PasswordHasher:
+    def __init__(self, rounds=None, workers=None, target_ms=TARGET_MS):
+        self.rounds = rounds or calibrate(target_ms)
+        # Leave cores free for rendering even under a login burst
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                        thread_name_prefix="bcrypt")
+
+    def hash(self, password):
+        return self._pool.submit(self._hash, password).result()
+
+    def verify(self, password, hashed):
+        """Return ``(matches, needs_rehash)``."""
+        matches = self._pool.submit(bcrypt.checkpw, password.encode(), hashed).result()
+        return matches, matches and self.needs_rehash(hashed)
+
+    def needs_rehash(self, hashed):
+        return hash_rounds(hashed) < self.rounds
+
+    def _hash(self, password):
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(self.rounds))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
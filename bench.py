@@ -0,0 +1,635 @@
+"""Performance benchmarks for United Union Bank.
+
+Run from the project root, each against a throwaway database:
+
+    python bench.py transfers --writers 8 --seconds 5
+    python bench.py pages --sizes 10000,100000,1000000,10000000
+    python bench.py statement --rows 100000
+    python bench.py logins --sessions 32 --workers 4
+    python bench.py logo
+    python bench.py payloads --rows 10
+    python bench.py convert --rows 1000000
+    python bench.py portfolio --users 10000
+    python bench.py reconcile --entries 5000000 --new 10000
+    python bench.py bulk --rows 50000
+    python bench.py schedule --due 20000 --future 200000
+    python bench.py risk --rows 1000000 --score 100000
+    python bench.py ids --existing 1000000 --signups 20000 --workers 8
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import database
+import ledger
+import queries
+
+
+# ---------------- FIXTURES ----------------
+def make_database(path, users=100, opening_balance=100_000_000):
+    """Fresh database with ``users`` INR wallets; balances are in paise."""
+    conn = database.connect(path)
+    database.migrate(conn)
+    conn.executemany("INSERT INTO wallets (user_id, balance) VALUES (?, ?)",
+                     [(i, opening_balance) for i in range(1, users + 1)])
+    conn.commit()
+    conn.close()
+
+
+def fill_transactions(conn, count, users, rng, chunk=100_000):
+    """Append ``count`` random transfers between users 2..users over three years."""
+    epoch = datetime(2023, 1, 1)
+    span = 3 * 365 * 86400
+
+    def rows(n):
+        for _ in range(n):
+            sender, receiver = rng.sample(range(2, users + 1), 2)
+            when = epoch + timedelta(seconds=rng.randrange(span))
+            yield (sender, receiver, rng.randint(100, 500_000), "TRANSFER", "", when.isoformat())
+
+    while count > 0:
+        n = min(chunk, count)
+        conn.executemany("INSERT INTO transactions (sender, receiver, amount, type, description, time) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", rows(n))
+        conn.commit()
+        count -= n
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+# ---------------- BENCHMARKS ----------------
+def bench_transfers(args):
+    """Transfer throughput with N concurrent writers, each on its own connection."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        make_database(path, users=args.users)
+        stop_at = time.perf_counter() + args.seconds
+        counts = [0] * args.writers
+
+        def writer(slot):
+            conn = database.connect(path)
+            rng = random.Random(slot)
+            while time.perf_counter() < stop_at:
+                sender, receiver = rng.sample(range(1, args.users + 1), 2)
+                try:
+                    ledger.transfer(conn, sender, receiver, rng.randint(100, 50_000), "bench")
+                except ledger.InsufficientFunds:
+                    pass
+                counts[slot] += 1
+            conn.close()
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        conn = sqlite3.connect(path)
+        total = conn.execute("SELECT SUM(balance) FROM wallets").fetchone()[0]
+        logged = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+        conn.close()
+
+    done = sum(counts)
+    print(f"writers={args.writers} transfers={done} elapsed={elapsed:.2f}s "
+          f"throughput={done / elapsed:,.0f}/s")
+    expected = args.users * 100_000_000
+    print(f"logged={logged} balance_conserved={total == expected}")
+
+
+def bench_pages(args):
+    """Dashboard/analytics/statement query latency for one user as the table grows."""
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        make_database(path, users=args.users)
+        conn = database.connect(path)
+        # User 1 keeps a fixed-size history; everything else is other users' traffic
+        fill_transactions(conn, args.history, args.users, rng)
+        conn.execute("UPDATE transactions SET sender = 1 WHERE id % 2 = 0")
+        conn.execute("UPDATE transactions SET receiver = 1 WHERE id % 2 = 1 AND sender != 1")
+        conn.commit()
+
+        start, end = date(2025, 1, 1), date(2025, 3, 31)
+        page = {
+            "recent": lambda: queries.recent_transactions(conn, 1, 10),
+            "count": lambda: queries.transaction_count(conn, 1),
+            "wallet": lambda: queries.wallet_summary(conn, 1),
+            "analytics": lambda: queries.daily_totals(conn, 1),
+            "monthly": lambda: queries.monthly_deposits(conn, 1, date(2025, 2, 14)),
+            "statement": lambda: list(queries.statement_rows(conn, 1, start, end)),
+        }
+        print(f"{'rows':>10}  " + "  ".join(f"{name:>10}" for name in page) + "   (best ms)")
+        have = args.history
+        for size in sizes:
+            fill_transactions(conn, max(0, size - have), args.users, rng)
+            have = max(have, size)
+            database.rebuild_daily_totals(conn)
+            database.rebuild_wallet_counters(conn)
+            conn.execute("ANALYZE")
+            conn.commit()
+            cells = [timed(fn, args.repeat) for fn in page.values()]
+            print(f"{have:>10,}  " + "  ".join(f"{ms:>10.3f}" for ms in cells))
+        conn.close()
+
+
+def bench_statement(args):
+    """In-memory PDF statement generation time and peak RSS for one large history."""
+    import resource  # Unix only
+    from statements import render_statement
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        make_database(path, users=args.users)
+        conn = database.connect(path)
+        fill_transactions(conn, args.rows, args.users, rng)
+        conn.execute("UPDATE transactions SET sender = 1")
+        conn.commit()
+
+        user = (1, "bench", None, "Bench User", None, None, "UU00000001", None)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        pdf_bytes, count = render_statement(
+            user, queries.statement_rows(conn, 1, date(2023, 1, 1), date(2025, 12, 31)),
+            date(2023, 1, 1), date(2025, 12, 31))
+        elapsed = time.perf_counter() - started
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        conn.close()
+
+    print(f"rows={count:,} pdf={len(pdf_bytes) / 1e6:.1f}MB elapsed={elapsed:.2f}s "
+          f"peak_rss={rss_after / 1024:.0f}MB (+{(rss_after - rss_before) / 1024:.0f}MB)")
+
+
+def bench_logins(args):
+    """Login verification throughput and latency through the bcrypt worker pool."""
+    from auth import PasswordHasher, calibrate
+
+    rounds = args.rounds or calibrate(args.target_ms)
+    hasher = PasswordHasher(rounds=rounds, workers=args.workers)
+    stored = hasher.hash("correct horse")
+    stop_at = time.perf_counter() + args.seconds
+    latencies = []
+
+    def session():
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            hasher.verify("correct horse", stored)
+            latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=session) for _ in range(args.sessions)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    hasher.shutdown()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    print(f"rounds={rounds} workers={hasher.workers} sessions={args.sessions} "
+          f"logins={len(latencies)} throughput={len(latencies) / elapsed:.1f}/s "
+          f"p50={p50:.0f}ms p95={p95:.0f}ms")
+
+
+def bench_logo(args):
+    """Per-render logo cost: decode + resize from disk vs pre-rendered bytes."""
+    from PIL import Image
+    from assets import LogoAssets, find_logo
+
+    def from_disk(size):
+        path = find_logo()
+        with Image.open(path) as image:
+            return image.resize((size, size))
+
+    if find_logo() is None:
+        print("No logo file in the working directory")
+        return
+    assets = LogoAssets()
+    for size in (80, 100):
+        disk_ms = timed(lambda: from_disk(size), args.repeat)
+        cached_ms = timed(lambda: assets.get(size), args.repeat)
+        print(f"size={size} disk={disk_ms:.3f}ms cached={cached_ms:.4f}ms "
+              f"saved={disk_ms - cached_ms:.3f}ms/render")
+    print(f"one-off load={assets.load_ms:.1f}ms")
+
+
+def bench_payloads(args):
+    """st.markdown payloads and their bytes for the stylesheet and recent-transactions list.
+
+    Counts the strings each approach hands to st.markdown, one call per
+    payload; it does not run Streamlit or measure its forward messages.
+    """
+    import templates
+
+    raw_css_bytes = len(templates._CSS.encode()) + len("<style></style>")
+    rows = [{"css_class": "transaction-positive", "description": f"📥 Salary {i} (received)",
+             "time": "2026-01-01T10:00:00", "amount": "+₹1,000.00"} for i in range(args.rows)]
+
+    def legacy():
+        # The per-row f-string and st.markdown call the dashboard used to make
+        return [f"""
+            <div class="{r['css_class']}">
+                <strong>{r['description']}</strong><br>
+                <small>{r['time']}</small>
+                <div style="float: right; font-weight: bold;">
+                    {r['amount']}
+                </div>
+            </div>
+            """ for r in rows]
+
+    def compiled():
+        return [templates.TRANSACTION_ROW.render_many(rows)]
+
+    for name, build in (("legacy", legacy), ("templates", compiled)):
+        payloads = build()
+        ms = timed(build, args.repeat)
+        print(f"{name:>10}: recent list st.markdown calls={len(payloads)} "
+              f"payload bytes={sum(len(m.encode()) for m in payloads):,} build={ms:.3f}ms")
+    print(f"stylesheet: raw={raw_css_bytes:,} bytes minified={len(templates.STYLE.encode()):,} bytes")
+
+
+def bench_convert(args):
+    """Batch currency conversion: per-amount dict lookups vs the NumPy cross-rate matrix."""
+    import numpy as np
+    import currency
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = database.connect(os.path.join(tmp, "bench.db"))
+        database.migrate(conn)
+        table = currency.load(conn)
+        conn.close()
+    rng = random.Random(7)
+    amounts = [rng.uniform(1, 5000) for _ in range(args.rows)]
+    from_codes = [rng.choice(table.codes) for _ in range(args.rows)]
+    to_codes = [rng.choice(table.codes) for _ in range(args.rows)]
+    inr_per_unit = dict(zip(table.codes, table.inr_per_unit.tolist()))
+
+    def loop():
+        # What show_currency_page did, one amount at a time
+        return [a * inr_per_unit[f] / inr_per_unit[t]
+                for a, f, t in zip(amounts, from_codes, to_codes)]
+
+    loop_ms = timed(loop, args.repeat)
+    batch_ms = timed(lambda: table.convert(amounts, from_codes, to_codes), args.repeat)
+    # Amounts already an array and codes already indices, as a stored column would be
+    amounts_array = np.asarray(amounts)
+    from_idx, to_idx = table.indices(from_codes), table.indices(to_codes)
+    indexed_ms = timed(lambda: table.convert(amounts_array, from_idx, to_idx), args.repeat)
+    history_ms = timed(lambda: table.convert(amounts_array, "INR", "USD"), args.repeat)
+    print(f"rows={args.rows:,} loop={loop_ms:.1f}ms batch={batch_ms:.1f}ms "
+          f"pre-indexed={indexed_ms:.2f}ms single-pair={history_ms:.2f}ms")
+
+
+def bench_portfolio(args):
+    """Home-currency portfolio value: one query per wallet vs one query and a vectorized pass."""
+    import currency
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        make_database(path, users=args.users)
+        conn = database.connect(path)
+        table = currency.load(conn)
+        # Every user also holds a wallet in each foreign currency
+        conn.executemany("INSERT INTO wallets (user_id, currency, balance) VALUES (?, ?, ?)",
+                         [(u, code, 10_000) for u in range(1, args.users + 1)
+                          for code in table.codes[1:]])
+        conn.commit()
+        rng = random.Random(3)
+        users = [rng.randint(1, args.users) for _ in range(args.repeat)]
+
+        def per_wallet():
+            for user_id in users:
+                total = 0.0
+                for code in table.codes:
+                    row = conn.execute("SELECT balance FROM wallets WHERE user_id=? AND currency=?",
+                                       (user_id, code)).fetchone()
+                    if row:
+                        total += row[0] * table.rate(code, "INR")
+
+        def vectorized():
+            for user_id in users:
+                codes, balances = zip(*queries.wallet_balances(conn, user_id))
+                table.value(balances, codes, "INR")
+
+        per_ms = timed(per_wallet, 3) / args.repeat
+        vec_ms = timed(vectorized, 3) / args.repeat
+        conn.close()
+    print(f"wallets/user={len(table.codes)} per-wallet={per_ms:.3f}ms vectorized={vec_ms:.3f}ms "
+          f"per valuation")
+
+
+def bench_reconcile(args):
+    """Reconciliation time: full journal rescan vs incremental run over the new entries."""
+    from contextlib import nullcontext
+    from reconcile import Reconciler
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        make_database(path, users=args.users)
+        conn = database.connect(path)
+        # Two journal lines per transfer
+        fill_transactions(conn, args.entries // 2, args.users, rng)
+        database.rebuild_journal(conn)
+        conn.commit()
+        reconciler = Reconciler(lambda: nullcontext(conn))
+        entries = conn.execute("SELECT MAX(id) FROM journal_entries").fetchone()[0]
+
+        started = time.perf_counter()
+        for _ in range(args.new // 2):
+            sender, receiver = rng.sample(range(1, args.users + 1), 2)
+            ledger.transfer(conn, sender, receiver, rng.randint(100, 50_000), "bench")
+        posted = time.perf_counter() - started
+
+        incremental = reconciler.run_once()
+        full = reconciler.run_once(full=True)
+        conn.close()
+    print(f"journal={entries:,} entries, +{incremental['entries']:,} new "
+          f"(posted in {posted:.1f}s)")
+    print(f"incremental={incremental['elapsed_ms']:.1f}ms full={full['elapsed_ms']:.0f}ms "
+          f"mismatches={len(incremental['mismatches'])}/{len(full['mismatches'])}")
+
+
+def bench_bulk(args):
+    """Payroll-style credit file: one ledger.transfer per row vs the chunked bulk pipeline."""
+    import io
+    import bulk
+
+    rng = random.Random(0)
+    lines = ["account_number,amount,description"] + [
+        f"UU{rng.randint(2, args.users):08d},{rng.randint(10_000, 200_000)}.00,Salary"
+        for _ in range(args.rows)]
+    for name in ("per-row", "bulk"):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            make_database(path, users=args.users, opening_balance=10 ** 15)
+            conn = database.connect(path)
+            conn.executemany("INSERT INTO users (id, username, account_number) VALUES (?, ?, ?)",
+                             [(i, f"u{i}", f"UU{i:08d}") for i in range(1, args.users + 1)])
+            conn.commit()
+            rows = bulk.parse(io.StringIO("\n".join(lines)))
+            started = time.perf_counter()
+            if name == "bulk":
+                bulk.BulkImport(conn, 1, chunk_size=args.chunk).post(rows)
+            else:
+                # What the deposit/transfer pages would do, one click per row
+                for row in rows[:args.sample]:
+                    (user_id,) = conn.execute("SELECT id FROM users WHERE account_number = ?",
+                                              (row["account_number"],)).fetchone()
+                    ledger.transfer(conn, 1, user_id, ledger.to_minor(row["amount"]), "Salary")
+            elapsed = time.perf_counter() - started
+            done = len(rows) if name == "bulk" else args.sample
+            conn.close()
+        print(f"{name:>8}: {done:,} credits in {elapsed:.2f}s ({done / elapsed:,.0f}/s)")
+
+
+def bench_schedule(args):
+    """Standing orders: drain the due ones while many more are scheduled for later."""
+    from contextlib import nullcontext
+    from reconcile import Reconciler
+    from scheduler import ACTIVE, FAILED, MONTHLY, Scheduler
+
+    rng = random.Random(0)
+    now = datetime(2026, 1, 15, 9, 0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        make_database(path, users=args.users)
+        conn = database.connect(path)
+        # Every tenth payer is broke, so their orders fail for insufficient funds
+        conn.executemany("UPDATE wallets SET balance = 0 WHERE user_id = ?",
+                         [(i,) for i in range(10, args.users + 1, 10)])
+        database.rebuild_journal(conn)
+
+        def orders(count, start, span):
+            for _ in range(count):
+                sender, receiver = rng.sample(range(1, args.users + 1), 2)
+                when = start + timedelta(seconds=rng.randrange(span))
+                yield (sender, receiver, rng.randint(100, 50_000), "INR", "INR", "bench",
+                       MONTHLY, ACTIVE, when.isoformat(), now.isoformat())
+
+        conn.executemany("""
+            INSERT INTO scheduled_transfers
+            (user_id, receiver, amount, currency, to_currency, description, frequency, status,
+             next_run_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [*orders(args.due, now - timedelta(days=1), 86400),
+              *orders(args.future, now + timedelta(minutes=1), 27 * 86400)])
+        conn.commit()
+        plan = conn.execute("""
+            EXPLAIN QUERY PLAN SELECT id FROM scheduled_transfers
+            WHERE status = ? AND next_run_at <= ? ORDER BY next_run_at LIMIT ?
+        """, (ACTIVE, now.isoformat(), args.batch)).fetchall()[-1][-1]
+
+        scheduler = Scheduler(lambda: nullcontext(conn), batch_size=args.batch)
+        started = time.perf_counter()
+        taken = scheduler.drain(now)
+        elapsed = time.perf_counter() - started
+        failed = conn.execute("SELECT COUNT(*) FROM scheduled_transfers WHERE last_status = ?",
+                              (FAILED,)).fetchone()[0]
+        mismatches = Reconciler(lambda: nullcontext(conn)).run_once(full=True)["mismatches"]
+        conn.close()
+    print(f"plan: {plan}")
+    print(f"due={taken:,} of {args.due + args.future:,} orders in {elapsed:.2f}s "
+          f"({taken / elapsed * 60:,.0f}/min), failed={failed:,}, mismatches={len(mismatches)}")
+
+
+def bench_risk(args):
+    """Risk scoring cost per transaction, and transfer throughput with and without it."""
+    from contextlib import nullcontext
+    import numpy as np
+    from risk import RiskScorer
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        make_database(path, users=args.users, opening_balance=10 ** 15)
+        conn = database.connect(path)
+        fill_transactions(conn, args.rows, args.users, rng)
+        scorer = RiskScorer(lambda: nullcontext(conn))
+
+        # First sight of each user loads their history from the database
+        started = time.perf_counter()
+        for user_id in range(2, args.users + 1):
+            scorer.assess(user_id, "TRANSFER", 1000, receiver=1)
+        cold = (time.perf_counter() - started) / (args.users - 1) * 1000
+
+        timings = np.empty(args.score)
+        now = time.time()
+        for i in range(args.score):
+            sender, receiver = rng.sample(range(2, args.users + 1), 2)
+            started = time.perf_counter()
+            assessment = scorer.assess(sender, "TRANSFER", rng.randint(100, 500_000),
+                                       receiver=receiver, now=now + i * 0.01)
+            scorer.observe(assessment)
+            timings[i] = time.perf_counter() - started
+        p50, p99 = np.percentile(timings, [50, 99]) * 1000
+
+        for name, scoring in (("without", None), ("with", scorer)):
+            started = time.perf_counter()
+            for _ in range(args.transfers):
+                sender, receiver = rng.sample(range(2, args.users + 1), 2)
+                try:
+                    ledger.transfer(conn, sender, receiver, rng.randint(100, 50_000), "bench",
+                                    risk=scoring)
+                except ledger.TransactionHeld:
+                    pass
+            elapsed = time.perf_counter() - started
+            print(f"transfers {name:>7} scoring: {args.transfers / elapsed:,.0f}/s")
+        conn.close()
+    print(f"score+observe: p50={p50:.3f}ms p99={p99:.3f}ms max={timings.max() * 1000:.3f}ms "
+          f"(first sight of a user: {cold:.2f}ms)")
+
+
+def bench_ids(args):
+    """Concurrent signups: random account numbers vs block-allocated ones."""
+    from contextlib import nullcontext
+    import ids
+
+    rng = random.Random(0)
+    for name in ("random", "allocator"):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            make_database(path, users=0)
+            conn = database.connect(path)
+            # An established user base on the old 8-digit numbers
+            conn.executemany("INSERT INTO users (username, account_number) VALUES (?, ?)",
+                             ((f"old{n}", f"UU{n}") for n in
+                              rng.sample(range(10_000_000, 100_000_000), args.existing)))
+            conn.commit()
+            conn.close()
+            errors = [0] * args.workers
+
+            def worker(w):
+                # One connection and one allocator per worker, as separate processes would have
+                conn = database.connect(path)
+                allocator = ids.IdAllocator(lambda: nullcontext(conn))
+                local = random.Random(1000 + w)
+                for i in range(args.signups // args.workers):
+                    number = (allocator.account_number() if name == "allocator"
+                              else f"UU{local.randint(10_000_000, 99_999_999)}")
+                    try:
+                        conn.execute("INSERT INTO users (username, account_number) VALUES (?, ?)",
+                                     (f"w{w}u{i}", number))
+                        conn.commit()
+                    except sqlite3.IntegrityError:
+                        conn.rollback()
+                        errors[w] += 1
+                conn.close()
+
+            threads = [threading.Thread(target=worker, args=(w,)) for w in range(args.workers)]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+        print(f"{name:>9}: {args.signups:,} signups by {args.workers} workers in {elapsed:.2f}s, "
+              f"{sum(errors):,} UNIQUE constraint errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("transfers", help=bench_transfers.__doc__)
+    p.add_argument("--writers", type=int, default=4)
+    p.add_argument("--users", type=int, default=100)
+    p.add_argument("--seconds", type=float, default=5.0)
+    p.set_defaults(func=bench_transfers)
+
+    p = sub.add_parser("pages", help=bench_pages.__doc__)
+    p.add_argument("--sizes", default="10000,100000,1000000,10000000")
+    p.add_argument("--users", type=int, default=10_000)
+    p.add_argument("--history", type=int, default=500)
+    p.add_argument("--repeat", type=int, default=20)
+    p.set_defaults(func=bench_pages)
+
+    p = sub.add_parser("statement", help=bench_statement.__doc__)
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--users", type=int, default=100)
+    p.set_defaults(func=bench_statement)
+
+    p = sub.add_parser("logins", help=bench_logins.__doc__)
+    p.add_argument("--sessions", type=int, default=32)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--rounds", type=int, default=None)
+    p.add_argument("--target-ms", type=float, default=250)
+    p.add_argument("--seconds", type=float, default=5.0)
+    p.set_defaults(func=bench_logins)
+
+    p = sub.add_parser("logo", help=bench_logo.__doc__)
+    p.add_argument("--repeat", type=int, default=50)
+    p.set_defaults(func=bench_logo)
+
+    p = sub.add_parser("payloads", help=bench_payloads.__doc__.splitlines()[0])
+    p.add_argument("--rows", type=int, default=10)
+    p.add_argument("--repeat", type=int, default=200)
+    p.set_defaults(func=bench_payloads)
+
+    p = sub.add_parser("convert", help=bench_convert.__doc__)
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_convert)
+
+    p = sub.add_parser("portfolio", help=bench_portfolio.__doc__)
+    p.add_argument("--users", type=int, default=10_000)
+    p.add_argument("--repeat", type=int, default=1000)
+    p.set_defaults(func=bench_portfolio)
+
+    p = sub.add_parser("reconcile", help=bench_reconcile.__doc__)
+    p.add_argument("--entries", type=int, default=2_000_000)
+    p.add_argument("--new", type=int, default=10_000)
+    p.add_argument("--users", type=int, default=10_000)
+    p.set_defaults(func=bench_reconcile)
+
+    p = sub.add_parser("bulk", help=bench_bulk.__doc__)
+    p.add_argument("--rows", type=int, default=50_000)
+    p.add_argument("--users", type=int, default=10_000)
+    p.add_argument("--chunk", type=int, default=5000)
+    p.add_argument("--sample", type=int, default=5000, help="Rows timed on the per-row path")
+    p.set_defaults(func=bench_bulk)
+
+    p = sub.add_parser("schedule", help=bench_schedule.__doc__)
+    p.add_argument("--due", type=int, default=20_000)
+    p.add_argument("--future", type=int, default=200_000)
+    p.add_argument("--users", type=int, default=10_000)
+    p.add_argument("--batch", type=int, default=500)
+    p.set_defaults(func=bench_schedule)
+
+    p = sub.add_parser("risk", help=bench_risk.__doc__)
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--users", type=int, default=1000)
+    p.add_argument("--score", type=int, default=100_000)
+    p.add_argument("--transfers", type=int, default=5000)
+    p.set_defaults(func=bench_risk)
+
+    p = sub.add_parser("ids", help=bench_ids.__doc__)
+    p.add_argument("--existing", type=int, default=1_000_000)
+    p.add_argument("--signups", type=int, default=20_000)
+    p.add_argument("--workers", type=int, default=8)
+    p.set_defaults(func=bench_ids)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
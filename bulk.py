@@ -0,0 +1,269 @@
+"""Bulk (payroll-style) credits for United Union Bank.
+
+A credit file is a CSV with ``account_number`` and ``amount`` columns and an
+optional ``description``.  ``BulkImport`` validates every row, resolves all
+recipients with one set-based query, then posts the valid rows through
+``ledger.post_batch`` in chunked transactions.  Each row ends up in the report
+as POSTED (with its transaction id), HELD for review, or REJECTED (with the
+reason), so a failed chunk or a bad line never hides the rest of the file.
+
+    python bulk.py salaries.csv --from johndoe --report salaries_report.csv
+"""
+import argparse
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+import database
+import ledger
+
+POSTED, HELD, REJECTED = "POSTED", ledger.HELD, "REJECTED"
+CHUNK_SIZE = 5000
+MAX_ROWS = 100_000
+MAX_CREDIT = ledger.to_minor(10_000_000)
+
+REPORT_FIELDS = ["line", "account_number", "amount", "description", "status", "message", "tx_id"]
+
+
+class BulkError(Exception):
+    """Raised when a credit file cannot be read at all."""
+
+
+def parse(fileobj):
+    """Read a credit file into row dicts: line, account_number, amount, description.
+
+    ``amount`` stays as text; ``BulkImport.validate`` converts it.
+    """
+    text = fileobj.read()
+    if isinstance(text, bytes):
+        text = text.decode("utf-8-sig")
+    reader = csv.DictReader(io.StringIO(text))
+    fields = {name.strip().lower() for name in reader.fieldnames or []}
+    if not {"account_number", "amount"} <= fields:
+        raise BulkError("The file needs account_number and amount columns")
+    rows = []
+    for line, raw in enumerate(reader, start=2):
+        row = {key.strip().lower(): (value or "").strip() for key, value in raw.items() if key}
+        rows.append({"line": line, "account_number": row.get("account_number", ""),
+                     "amount": row.get("amount", ""), "description": row.get("description", "")})
+        if len(rows) > MAX_ROWS:
+            raise BulkError(f"At most {MAX_ROWS:,} rows per file")
+    return rows
+
+
+def parse_amount(text):
+    """Minor units for an amount cell, or ``ValueError`` for one that is not a
+    finite number with at most two decimals (it is never rounded).
+    """
+    try:
+        value = Decimal(text.replace(",", ""))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount {text!r}") from None
+    if not value.is_finite():
+        raise ValueError(f"Invalid amount {text!r}")
+    if value.normalize().as_tuple().exponent < -2:
+        raise ValueError(f"Amount {text!r} has more than two decimal places")
+    return int(value * ledger.MINOR_UNITS)
+
+
+class BulkImport:
+    """Post a parsed credit file.
+
+    ``payer_id`` is the user whose ``currency`` wallet funds the credits (a
+    payroll run) or None when the bank itself credits the accounts.
+    ``limits`` is an optional ``limits.Limiter``: each credit a payer makes
+    counts against their transfer limits like any other transfer, and a row
+    above them is rejected.  ``risk`` is an optional ``risk.RiskScorer``;
+    every row is scored against the payer's history before the file, so the
+    file itself does not read as a burst, and a row it holds is recorded
+    HELD.  ``rates`` values a foreign ``currency`` in INR.
+    """
+
+    def __init__(self, conn, payer_id=None, currency=ledger.BASE_CURRENCY, chunk_size=CHUNK_SIZE,
+                 limits=None, rates=None, risk=None):
+        self.conn = conn
+        self.payer_id = payer_id
+        self.currency = currency
+        self.chunk_size = chunk_size
+        self.limits = limits if payer_id is not None else None
+        self.risk = risk if payer_id is not None else None
+        self.rates = rates
+        self.trans_type = "DEPOSIT" if payer_id is None else "TRANSFER"
+
+    def validate(self, rows):
+        """Fill in ``status``/``message`` for bad rows and ``user_id``/``minor`` for good ones."""
+        for row in rows:
+            row["status"], row["message"], row["tx_id"] = None, "", None
+            try:
+                row["minor"], error = parse_amount(row["amount"]), None
+            except ValueError as exc:
+                row["minor"], error = None, str(exc)
+            if not row["account_number"]:
+                self._reject(row, "Missing account number")
+            elif row["minor"] is None:
+                self._reject(row, error)
+            elif row["minor"] <= 0:
+                self._reject(row, "Amount must be positive")
+            elif row["minor"] > MAX_CREDIT:
+                self._reject(row, f"Amount above the per-row limit of {ledger.to_major(MAX_CREDIT):,.2f}")
+
+        # One lookup for every distinct account in the file
+        accounts = sorted({row["account_number"] for row in rows if row["status"] is None})
+        found = dict(self.conn.execute("""
+            SELECT account_number, id FROM users
+            WHERE account_number IN (SELECT value FROM json_each(?))
+        """, (json.dumps(accounts),)).fetchall())
+        for row in rows:
+            if row["status"] is not None:
+                continue
+            row["user_id"] = found.get(row["account_number"])
+            if row["user_id"] is None:
+                self._reject(row, "Unknown account number")
+            elif row["user_id"] == self.payer_id:
+                self._reject(row, "Cannot credit the paying account")
+        return rows
+
+    def post(self, rows):
+        """Validate and post ``rows``; returns them with their final status."""
+        self.validate(rows)
+        valid = [row for row in rows if row["status"] is None]
+        if self.limits is not None or self.risk is not None:
+            valid = [row for row in valid if self._check(row)]
+        now = datetime.now().isoformat()
+        posted = []
+        for start in range(0, len(valid), self.chunk_size):
+            chunk = valid[start:start + self.chunk_size]
+            reservations = [row["reservation"] for row in chunk if row.get("reservation")]
+            # One post_batch per status; held rows are recorded one by one
+            groups = {}
+            for row in chunk:
+                status = row["assessment"]["status"] if self.risk is not None else ledger.COMPLETED
+                groups.setdefault(status, []).append(row)
+            try:
+                with ledger.immediate(self.conn):
+                    for status, group in groups.items():
+                        if status == ledger.HELD:
+                            ids = [ledger.post(self.conn, self.payer_id, row["user_id"], row["minor"],
+                                               self.trans_type, row["description"], now,
+                                               self.currency, status=status) for row in group]
+                        else:
+                            credits = [(row["user_id"], row["minor"], row["description"])
+                                       for row in group]
+                            ids = ledger.post_batch(self.conn, self.payer_id, credits,
+                                                    self.trans_type, now, self.currency, status)
+                        for row, tx_id in zip(group, ids):
+                            row["tx_id"] = tx_id
+                            if self.risk is not None:
+                                self.risk.persist(self.conn, tx_id, row["assessment"])
+                    if reservations:
+                        self.limits.persist(self.conn, *reservations)
+            except ledger.LedgerError as exc:
+                if reservations:
+                    self.limits.release(*reservations)
+                for row in chunk:
+                    row["tx_id"] = None
+                    self._reject(row, str(exc))
+                continue
+            except BaseException:
+                unposted = [row["reservation"] for row in valid[start:] if row.get("reservation")]
+                if unposted:
+                    self.limits.release(*unposted)
+                raise
+            if reservations:
+                self.limits.settle(*reservations)
+            for row in chunk:
+                held = self.risk is not None and row["assessment"]["status"] == ledger.HELD
+                row["status"], row["message"] = (HELD, "Held for review") if held else (POSTED, "")
+            posted.extend(chunk)
+
+        # Observed only now, so later rows are not scored as a burst of the earlier ones
+        if self.risk is not None:
+            for row in posted:
+                self.risk.observe(row["assessment"])
+        return rows
+
+    def _check(self, row):
+        """Count a payer row against the limits and score it; False if rejected."""
+        reservation = None
+        try:
+            if self.limits is not None:
+                reservation = self.limits.reserve(self.payer_id, row["minor"], self.currency,
+                                                  self.rates)
+            if self.risk is not None:
+                row["assessment"] = self.risk.assess(self.payer_id, "TRANSFER", row["minor"],
+                                                     self.currency, self.rates, row["user_id"])
+                if row["assessment"]["status"] == ledger.HELD and reservation is not None:
+                    # Counted against the limits only if it is released
+                    self.limits.release(reservation)
+                    reservation = None
+        except ledger.LedgerError as exc:
+            if reservation is not None:
+                self.limits.release(reservation)
+            self._reject(row, str(exc))
+            return False
+        row["reservation"] = reservation
+        return True
+
+    @staticmethod
+    def _reject(row, message):
+        row["status"], row["message"] = REJECTED, message
+
+
+def summary(rows):
+    posted = [row for row in rows if row["status"] == POSTED]
+    held = sum(row["status"] == HELD for row in rows)
+    return {"rows": len(rows), "posted": len(posted), "held": held,
+            "rejected": len(rows) - len(posted) - held,
+            "total": sum(row["minor"] for row in posted)}
+
+
+def report_csv(rows):
+    """Per-row result report as CSV bytes."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, REPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Post a CSV file of credits")
+    parser.add_argument("path")
+    parser.add_argument("--db", default=database.DB_PATH)
+    parser.add_argument("--from", dest="payer", help="Username whose wallet funds the credits")
+    parser.add_argument("--currency", default=ledger.BASE_CURRENCY)
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--report", help="Where to write the per-row report (default: stdout)")
+    args = parser.parse_args()
+
+    conn = database.connect(args.db)
+    database.migrate(conn)
+    payer_id = None
+    if args.payer:
+        row = conn.execute("SELECT id FROM users WHERE username = ?", (args.payer,)).fetchone()
+        if row is None:
+            parser.error(f"Unknown user {args.payer!r}")
+        payer_id = row[0]
+
+    with open(args.path, newline="", encoding="utf-8-sig") as f:
+        rows = parse(f)
+    started = time.perf_counter()
+    BulkImport(conn, payer_id, args.currency, args.chunk).post(rows)
+    elapsed = time.perf_counter() - started
+
+    report = report_csv(rows)
+    if args.report:
+        with open(args.report, "wb") as f:
+            f.write(report)
+    else:
+        print(report.decode(), end="")
+    result = summary(rows)
+    print(f"posted={result['posted']:,} rejected={result['rejected']:,} "
+          f"total={ledger.to_major(result['total']):,.2f} {args.currency} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Exchange rates and currency conversion for United Union Bank.
+
+Rates are stored in SQLite as numbered snapshots (``rate_versions`` and
+``exchange_rates``), each giving the INR value of one unit of every
+currency.  ``RateTable`` loads one snapshot into a NumPy cross-rate matrix,
+``matrix[i, j]`` being the units of currency ``j`` per unit of currency ``i``,
+so whole arrays of amounts and currency pairs convert in a single vectorized
+pass.
+
+New snapshots are imported from a local CSV or JSON file:
+
+    python currency.py import rates.csv
+"""
+import argparse
+import csv
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+import database
+from ledger import immediate
+
+BASE_CURRENCY = "INR"
+
+
+class RateError(Exception):
+    """Raised for unknown currencies or malformed rate snapshots."""
+
+
+class RateTable:
+    def __init__(self, version, rates):
+        """``rates`` is a list of (code, symbol, inr_per_unit)."""
+        self.version = version
+        self.codes = [code for code, _, _ in rates]
+        self.symbols = {code: symbol for code, symbol, _ in rates}
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.inr_per_unit = np.array([rate for _, _, rate in rates], dtype=np.float64)
+        self.matrix = self.inr_per_unit[:, None] / self.inr_per_unit[None, :]
+
+    def label(self, code):
+        return f"{code} ({self.symbols[code]})"
+
+    def indices(self, codes):
+        """Map a currency code or sequence of codes to matrix indices.
+
+        An integer array is taken to be indices already and returned as is, so
+        callers converting the same columns repeatedly can map them once.
+        """
+        if isinstance(codes, np.ndarray) and codes.dtype.kind in "iu":
+            return codes
+        try:
+            if isinstance(codes, str):
+                return self.index[codes]
+            return np.fromiter(map(self.index.__getitem__, codes), dtype=np.intp, count=len(codes))
+        except KeyError as exc:
+            raise RateError(f"Unknown currency {exc.args[0]!r}") from None
+
+    def rate(self, from_code, to_code):
+        return float(self.matrix[self.indices(from_code), self.indices(to_code)])
+
+    def convert(self, amounts, from_codes, to_codes):
+        """Convert arrays of amounts; each code argument may be one code or one per amount."""
+        amounts = np.asarray(amounts, dtype=np.float64)
+        return amounts * self.matrix[self.indices(from_codes), self.indices(to_codes)]
+
+    def value(self, amounts, codes, to_code):
+        """Total of ``amounts`` held in ``codes``, valued in ``to_code``."""
+        return float(self.convert(amounts, codes, to_code).sum())
+
+
+# ---------------- STORAGE ----------------
+def _insert_version(conn, rates, source):
+    cur = conn.execute("INSERT INTO rate_versions (source, imported_at) VALUES (?, ?)",
+                       (source, datetime.now().isoformat()))
+    version = cur.lastrowid
+    conn.executemany("""
+        INSERT INTO exchange_rates (version, code, symbol, inr_per_unit)
+        VALUES (?, ?, ?, ?)
+    """, [(version, code, symbol, rate) for code, symbol, rate in rates])
+    return version
+
+
+def load(conn, version=None):
+    """Load a snapshot (the latest by default) as a ``RateTable``."""
+    if version is None:
+        version = latest_version(conn)
+    rows = conn.execute("""
+        SELECT code, symbol, inr_per_unit FROM exchange_rates
+        WHERE version = ? ORDER BY id
+    """, (version,)).fetchall()
+    if not rows:
+        raise RateError(f"No exchange rates for version {version}")
+    return RateTable(version, rows)
+
+
+def latest_version(conn):
+    return conn.execute("SELECT MAX(version) FROM rate_versions").fetchone()[0]
+
+
+def parse_snapshot(path):
+    """Read (code, symbol, inr_per_unit) rows from a CSV or JSON file.
+
+    CSV needs ``code`` and ``inr_per_unit`` columns and may have ``symbol``.
+    JSON is either ``{"USD": 83.0, ...}``, ``{"rates": {...}}`` or a list of
+    objects with the same keys as the CSV columns.
+    """
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("rates", data)
+            entries = [{"code": code, "inr_per_unit": rate} for code, rate in data.items()]
+        else:
+            entries = data
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            entries = list(csv.DictReader(f))
+
+    rates = {BASE_CURRENCY: ("₹", 1.0)}
+    for entry in entries:
+        try:
+            code = str(entry["code"]).strip().upper()
+            rate = float(entry["inr_per_unit"])
+        except (KeyError, TypeError, ValueError):
+            raise RateError(f"Malformed rate entry: {entry!r}") from None
+        if not code or rate <= 0:
+            raise RateError(f"Invalid rate for {code!r}: {rate}")
+        rates[code] = (entry.get("symbol") or code, rate)
+
+    if rates[BASE_CURRENCY][1] != 1.0:
+        raise RateError(f"{BASE_CURRENCY} must have a rate of 1")
+    return [(code, symbol, rate) for code, (symbol, rate) in rates.items()]
+
+
+def import_snapshot(conn, path):
+    """Store the rates in ``path`` as a new version and return its number."""
+    rates = parse_snapshot(path)
+    with immediate(conn):
+        return _insert_version(conn, rates, os.path.basename(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage exchange rate snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("import", help="Import a CSV or JSON rate snapshot")
+    p.add_argument("path")
+    p.add_argument("--db", default=database.DB_PATH)
+    sub.add_parser("show", help="Print the latest snapshot").add_argument(
+        "--db", default=database.DB_PATH)
+    args = parser.parse_args()
+
+    conn = database.connect(args.db)
+    database.migrate(conn)
+    if args.command == "import":
+        version = import_snapshot(conn, args.path)
+        print(f"Imported rate version {version}")
+    table = load(conn)
+    print(f"Version {table.version}:")
+    for code, rate in zip(table.codes, table.inr_per_unit):
+        print(f"  {table.label(code):<12} {rate:>12.4f} {BASE_CURRENCY}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,727 @@
+"""SQLite connection handling and schema migrations for United Union Bank.
+
+Streamlit runs every session's script in its own thread, so a single shared
+cursor lets concurrent reruns read each other's rows.  ``ConnectionPool`` hands
+each thread its own connection for the duration of a ``with pool.connection()``
+block, caps the number of open connections and replaces any connection that
+fails a health check.
+
+The schema is versioned with ``PRAGMA user_version``.  ``migrate`` applies the
+outstanding steps from ``MIGRATIONS`` and returns immediately, without any
+schema introspection, once the database is current.
+"""
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+DB_PATH = "united_union_bank.db"
+
+# Per-connection tuning.  A negative cache_size is in KiB.
+CACHE_SIZE_KB = 16 * 1024
+MMAP_SIZE = 128 * 1024 * 1024
+
+
+def connect(path=DB_PATH, timeout=30.0, cache_size_kb=CACHE_SIZE_KB, mmap_size=MMAP_SIZE):
+    """Open a connection with the bank's per-connection PRAGMAs applied."""
+    # Pooled connections move between threads but are only ever used by the
+    # thread that has them checked out.
+    conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{int(cache_size_kb)}")
+    conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+    return conn
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the pool timeout."""
+
+
+class ConnectionPool:
+    def __init__(self, path=DB_PATH, size=8, timeout=30.0, cache_size_kb=CACHE_SIZE_KB,
+                 mmap_size=MMAP_SIZE):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+
+    def _connect(self):
+        return connect(self.path, self.timeout, self.cache_size_kb, self.mmap_size)
+
+    @staticmethod
+    def _healthy(conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _checkout(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"No database connection free after {self.timeout}s")
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+        if self._healthy(conn):
+            return conn
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        return self._connect()
+
+    def _checkin(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        except sqlite3.Error:
+            conn.close()
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Yield this thread's connection, checking one out if needed.
+
+        Nested blocks in the same thread share the outer connection, so
+        helpers can open their own block without exhausting the pool.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+        conn = self._checkout()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._checkin(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# ---------------- MIGRATIONS ----------------
+def _m001_initial_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            password BLOB,
+            full_name TEXT,
+            email TEXT,
+            phone TEXT,
+            account_number TEXT UNIQUE,
+            created_at TEXT
+        )
+    """)
+
+    # Databases created before these columns existed
+    existing_columns = [col[1] for col in conn.execute("PRAGMA table_info(users)")]
+    for column_name, column_type in [
+        ("full_name", "TEXT"),
+        ("email", "TEXT"),
+        ("phone", "TEXT"),
+        ("account_number", "TEXT"),
+        ("created_at", "TEXT"),
+    ]:
+        if column_name not in existing_columns:
+            conn.execute(f"ALTER TABLE users ADD COLUMN {column_name} {column_type}")
+    if "account_number" not in existing_columns:
+        # SQLite cannot add a UNIQUE column, so enforce it with an index
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_account_number "
+                     "ON users(account_number)")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS wallets(
+            user_id INTEGER PRIMARY KEY,
+            balance REAL DEFAULT 0,
+            last_updated TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS transactions(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender INTEGER,
+            receiver INTEGER,
+            amount REAL,
+            type TEXT,
+            description TEXT,
+            time TEXT,
+            status TEXT DEFAULT 'COMPLETED'
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS virtual_cards(
+            user_id INTEGER,
+            card_number TEXT,
+            expiry_date TEXT,
+            cvv TEXT,
+            is_active INTEGER DEFAULT 1
+        )
+    """)
+
+
+def _m002_transaction_indexes(conn):
+    # Every history query is a per-user walk ordered by time
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_sender_time "
+                 "ON transactions(sender, time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_receiver_time "
+                 "ON transactions(receiver, time)")
+
+
+def rebuild_daily_totals(conn):
+    """Recompute ``daily_user_totals`` from the transactions table."""
+    conn.execute("DELETE FROM daily_user_totals")
+    conn.execute("""
+        INSERT INTO daily_user_totals (user_id, currency, day, type, total, count)
+        SELECT user_id, currency, date(time), type, SUM(amount), COUNT(*) FROM (
+            SELECT sender AS user_id, currency, time, type, amount FROM transactions
+            WHERE sender IS NOT NULL AND status NOT IN ('HELD', 'REJECTED')
+            UNION ALL
+            SELECT receiver, COALESCE(credit_currency, currency), time, type,
+                   COALESCE(credit_amount, amount)
+            FROM transactions
+            WHERE receiver IS NOT NULL AND sender IS NOT receiver
+            AND status NOT IN ('HELD', 'REJECTED')
+        )
+        GROUP BY user_id, currency, date(time), type
+    """)
+
+
+def _m003_daily_user_totals(conn):
+    # Per-user, per-day rollup maintained by ledger.record()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_user_totals(
+            user_id INTEGER,
+            day TEXT,
+            type TEXT,
+            total REAL DEFAULT 0,
+            count INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, day, type)
+        ) WITHOUT ROWID
+    """)
+    # Written against this version's schema; rebuild_daily_totals tracks the current one
+    conn.execute("""
+        INSERT INTO daily_user_totals (user_id, day, type, total, count)
+        SELECT user_id, date(time), type, SUM(amount), COUNT(*) FROM (
+            SELECT sender AS user_id, time, type, amount FROM transactions
+            WHERE sender IS NOT NULL
+            UNION ALL
+            SELECT receiver, time, type, amount FROM transactions
+            WHERE receiver IS NOT NULL AND sender IS NOT receiver
+        )
+        GROUP BY user_id, date(time), type
+    """)
+
+
+def rebuild_wallet_counters(conn):
+    """Recompute the cached counters on every wallet row."""
+    conn.execute("""
+        UPDATE wallets SET
+            tx_count = (SELECT COALESCE(SUM(count), 0) FROM daily_user_totals
+                        WHERE user_id = wallets.user_id AND currency = wallets.currency),
+            lifetime_deposits = (SELECT COALESCE(SUM(total), 0) FROM daily_user_totals
+                                 WHERE user_id = wallets.user_id AND currency = wallets.currency
+                                 AND type = 'DEPOSIT'),
+            lifetime_transfers_out = (SELECT COALESCE(SUM(amount), 0) FROM transactions
+                                      WHERE sender = wallets.user_id
+                                      AND currency = wallets.currency AND type = 'TRANSFER'
+                                      AND status NOT IN ('HELD', 'REJECTED')),
+            lifetime_transfers_in = (SELECT COALESCE(SUM(COALESCE(credit_amount, amount)), 0)
+                                     FROM transactions
+                                     WHERE receiver = wallets.user_id
+                                     AND COALESCE(credit_currency, currency) = wallets.currency
+                                     AND type = 'TRANSFER'
+                                     AND status NOT IN ('HELD', 'REJECTED'))
+    """)
+
+
+def _m004_wallet_counters(conn):
+    # Dashboard metrics cached on the wallet row, maintained by ledger.record()
+    for column in ("tx_count INTEGER", "lifetime_deposits REAL",
+                   "lifetime_transfers_out REAL", "lifetime_transfers_in REAL"):
+        conn.execute(f"ALTER TABLE wallets ADD COLUMN {column} DEFAULT 0")
+    # Written against this version's schema; rebuild_wallet_counters tracks the current one
+    conn.execute("""
+        UPDATE wallets SET
+            tx_count = (SELECT COALESCE(SUM(count), 0) FROM daily_user_totals
+                        WHERE user_id = wallets.user_id),
+            lifetime_deposits = (SELECT COALESCE(SUM(total), 0) FROM daily_user_totals
+                                 WHERE user_id = wallets.user_id AND type = 'DEPOSIT'),
+            lifetime_transfers_out = (SELECT COALESCE(SUM(amount), 0) FROM transactions
+                                      WHERE sender = wallets.user_id AND type = 'TRANSFER'),
+            lifetime_transfers_in = (SELECT COALESCE(SUM(amount), 0) FROM transactions
+                                     WHERE receiver = wallets.user_id AND type = 'TRANSFER')
+    """)
+
+
+def _m005_jobs(conn):
+    # Background document jobs, see jobs.py
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            kind TEXT,
+            params TEXT,
+            status TEXT,
+            created_at TEXT,
+            started_at TEXT,
+            finished_at TEXT,
+            file_name TEXT,
+            mime TEXT,
+            artifact BLOB,
+            error TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_user_created ON jobs(user_id, created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+
+
+def _m006_otps(conn):
+    # Server-side OTP challenges, see otp.py
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS otps(
+            id TEXT PRIMARY KEY,
+            user_id INTEGER,
+            salt BLOB,
+            code_hash BLOB,
+            created_at REAL,
+            expires_at REAL,
+            attempts INTEGER DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_otps_expires_at ON otps(expires_at)")
+
+
+def _m007_notifications(conn):
+    # Durable outbox drained by notify.Dispatcher
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS notifications(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel TEXT,
+            recipient TEXT,
+            kind TEXT,
+            body TEXT,
+            status TEXT,
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at REAL,
+            created_at REAL,
+            sent_at REAL,
+            last_error TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_notifications_due "
+                 "ON notifications(status, next_attempt_at)")
+
+
+def _m008_exchange_rates(conn):
+    # Versioned rate snapshots; currency.import_snapshot appends new versions
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rate_versions(
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT,
+            imported_at TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS exchange_rates(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            version INTEGER REFERENCES rate_versions(version),
+            code TEXT,
+            symbol TEXT,
+            inr_per_unit REAL,
+            UNIQUE(version, code)
+        )
+    """)
+    cur = conn.execute("INSERT INTO rate_versions (source, imported_at) VALUES (?, ?)",
+                       ("built-in defaults", datetime.now().isoformat()))
+    conn.executemany("""
+        INSERT INTO exchange_rates (version, code, symbol, inr_per_unit) VALUES (?, ?, ?, ?)
+    """, [(cur.lastrowid, code, symbol, rate) for code, symbol, rate in (
+        ("INR", "₹", 1.0),
+        ("USD", "$", 83.0),
+        ("EUR", "€", 89.5),
+        ("GBP", "£", 105.2),
+        ("AED", "د.إ", 22.6),
+        ("PKR", "₨", 0.30),
+    )])
+
+
+def _m009_currency_wallets(conn):
+    # One wallet per (user, currency); each user has a home currency
+    conn.execute("ALTER TABLE users ADD COLUMN home_currency TEXT DEFAULT 'INR'")
+
+    # The debit side is (amount, currency); credit_* is set only when the
+    # receiver was credited in another currency
+    conn.execute("ALTER TABLE transactions ADD COLUMN currency TEXT DEFAULT 'INR'")
+    conn.execute("ALTER TABLE transactions ADD COLUMN credit_amount REAL")
+    conn.execute("ALTER TABLE transactions ADD COLUMN credit_currency TEXT")
+
+    # SQLite cannot change a primary key in place, so rebuild both tables.
+    # WITHOUT ROWID keeps each wallet clustered on (user_id, currency), so the
+    # ledger's balance updates stay a single b-tree lookup.
+    conn.execute("""
+        CREATE TABLE wallets_new(
+            user_id INTEGER,
+            currency TEXT DEFAULT 'INR',
+            balance REAL DEFAULT 0,
+            last_updated TEXT,
+            tx_count INTEGER DEFAULT 0,
+            lifetime_deposits REAL DEFAULT 0,
+            lifetime_transfers_out REAL DEFAULT 0,
+            lifetime_transfers_in REAL DEFAULT 0,
+            PRIMARY KEY (user_id, currency)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO wallets_new
+        (user_id, currency, balance, last_updated, tx_count, lifetime_deposits,
+         lifetime_transfers_out, lifetime_transfers_in)
+        SELECT user_id, 'INR', balance, last_updated, tx_count, lifetime_deposits,
+               lifetime_transfers_out, lifetime_transfers_in
+        FROM wallets
+    """)
+    conn.execute("DROP TABLE wallets")
+    conn.execute("ALTER TABLE wallets_new RENAME TO wallets")
+
+    conn.execute("""
+        CREATE TABLE daily_user_totals_new(
+            user_id INTEGER,
+            currency TEXT DEFAULT 'INR',
+            day TEXT,
+            type TEXT,
+            total REAL DEFAULT 0,
+            count INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, currency, day, type)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO daily_user_totals_new (user_id, currency, day, type, total, count)
+        SELECT user_id, 'INR', day, type, total, count FROM daily_user_totals
+    """)
+    conn.execute("DROP TABLE daily_user_totals")
+    conn.execute("ALTER TABLE daily_user_totals_new RENAME TO daily_user_totals")
+
+
+def _m010_integer_minor_units(conn):
+    # Money as INTEGER minor units (paise, cents, ...) instead of REAL.  A
+    # REAL column would coerce integers back to floats, so every table that
+    # holds an amount is rebuilt with INTEGER columns.
+    minor = "CAST(ROUND({} * 100) AS INTEGER)"
+
+    conn.execute("""
+        CREATE TABLE wallets_new(
+            user_id INTEGER,
+            currency TEXT DEFAULT 'INR',
+            balance INTEGER DEFAULT 0,
+            last_updated TEXT,
+            tx_count INTEGER DEFAULT 0,
+            lifetime_deposits INTEGER DEFAULT 0,
+            lifetime_transfers_out INTEGER DEFAULT 0,
+            lifetime_transfers_in INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, currency)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        INSERT INTO wallets_new
+        SELECT user_id, currency, {minor.format("balance")}, last_updated, tx_count,
+               {minor.format("lifetime_deposits")}, {minor.format("lifetime_transfers_out")},
+               {minor.format("lifetime_transfers_in")}
+        FROM wallets
+    """)
+    conn.execute("DROP TABLE wallets")
+    conn.execute("ALTER TABLE wallets_new RENAME TO wallets")
+
+    conn.execute("""
+        CREATE TABLE transactions_new(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender INTEGER,
+            receiver INTEGER,
+            amount INTEGER,
+            type TEXT,
+            description TEXT,
+            time TEXT,
+            status TEXT DEFAULT 'COMPLETED',
+            currency TEXT DEFAULT 'INR',
+            credit_amount INTEGER,
+            credit_currency TEXT
+        )
+    """)
+    conn.execute(f"""
+        INSERT INTO transactions_new
+        SELECT id, sender, receiver, {minor.format("amount")}, type, description, time,
+               status, currency, {minor.format("credit_amount")}, credit_currency
+        FROM transactions
+    """)
+    conn.execute("DROP TABLE transactions")
+    conn.execute("ALTER TABLE transactions_new RENAME TO transactions")
+    _m002_transaction_indexes(conn)
+
+    conn.execute("""
+        CREATE TABLE daily_user_totals_new(
+            user_id INTEGER,
+            currency TEXT DEFAULT 'INR',
+            day TEXT,
+            type TEXT,
+            total INTEGER DEFAULT 0,
+            count INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, currency, day, type)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        INSERT INTO daily_user_totals_new
+        SELECT user_id, currency, day, type, {minor.format("total")}, count
+        FROM daily_user_totals
+    """)
+    conn.execute("DROP TABLE daily_user_totals")
+    conn.execute("ALTER TABLE daily_user_totals_new RENAME TO daily_user_totals")
+
+
+def rebuild_journal(conn):
+    """Re-derive ``journal_entries`` from the transactions table.
+
+    Wallet balances that the transactions do not explain (rows written before
+    the journal existed, or seeded directly) become opening lines against the
+    equity account.  Resets the reconciliation checkpoint to the new end of
+    the journal.
+    """
+    conn.execute("DELETE FROM journal_entries")
+    # HELD and REJECTED rows never moved money, so they have no lines
+    conn.execute("""
+        WITH posted AS (
+            SELECT * FROM transactions WHERE status NOT IN ('HELD', 'REJECTED')
+        )
+        INSERT INTO journal_entries (tx_id, user_id, account, currency, amount, time)
+        SELECT tx_id, user_id, account, currency, amount, time FROM (
+            SELECT id AS tx_id, 1 AS leg, sender AS user_id,
+                   CASE WHEN sender IS NULL THEN 'cash' ELSE 'wallet' END AS account,
+                   currency, -amount AS amount, time
+            FROM posted
+            UNION ALL
+            SELECT id, 2, NULL, 'fx', currency, amount, time FROM posted
+            WHERE credit_currency IS NOT NULL AND credit_currency != currency
+            UNION ALL
+            SELECT id, 3, NULL, 'fx', credit_currency, -credit_amount, time FROM posted
+            WHERE credit_currency IS NOT NULL AND credit_currency != currency
+            UNION ALL
+            SELECT id, 4, receiver, CASE WHEN receiver IS NULL THEN 'cash' ELSE 'wallet' END,
+                   COALESCE(credit_currency, currency), COALESCE(credit_amount, amount), time
+            FROM posted
+        )
+        ORDER BY tx_id, leg
+    """)
+    opening = conn.execute("""
+        SELECT w.user_id, w.currency, w.balance - COALESCE(j.total, 0) FROM wallets w
+        LEFT JOIN (
+            SELECT user_id, currency, SUM(amount) AS total FROM journal_entries
+            WHERE account = 'wallet' GROUP BY user_id, currency
+        ) j USING (user_id, currency)
+        WHERE w.balance != COALESCE(j.total, 0)
+    """).fetchall()
+    now = datetime.now().isoformat()
+    conn.executemany("""
+        INSERT INTO journal_entries (tx_id, user_id, account, currency, amount, time)
+        VALUES (NULL, ?, ?, ?, ?, ?)
+    """, [line for user_id, currency, diff in opening
+          for line in ((user_id, "wallet", currency, diff, now),
+                       (None, "equity", currency, -diff, now))])
+
+    conn.execute("DELETE FROM reconciled_balances")
+    conn.execute("""
+        INSERT INTO reconciled_balances (user_id, currency, balance)
+        SELECT user_id, currency, SUM(amount) FROM journal_entries
+        WHERE account = 'wallet' GROUP BY user_id, currency
+    """)
+    conn.execute("UPDATE reconciliation_state SET last_entry_id = "
+                 "(SELECT COALESCE(MAX(id), 0) FROM journal_entries), checked_at = ?", (now,))
+
+
+def _m011_journal(conn):
+    # Double-entry journal written by ledger.post(), and the incremental
+    # reconciliation state kept by reconcile.Reconciler
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS journal_entries(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tx_id INTEGER,
+            user_id INTEGER,
+            account TEXT,
+            currency TEXT,
+            amount INTEGER,
+            time TEXT
+        )
+    """)
+    # Wallet balances implied by the journal up to the checkpoint
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS reconciled_balances(
+            user_id INTEGER,
+            currency TEXT,
+            balance INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, currency)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS reconciliation_state(
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_entry_id INTEGER DEFAULT 0,
+            checked_at TEXT
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO reconciliation_state (id) VALUES (1)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS reconciliation_runs(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TEXT,
+            finished_at TEXT,
+            first_entry_id INTEGER,
+            last_entry_id INTEGER,
+            entries INTEGER,
+            wallets_checked INTEGER,
+            mismatches INTEGER,
+            details TEXT
+        )
+    """)
+    rebuild_journal(conn)
+
+
+def _m012_scheduled_transfers(conn):
+    # Standing orders executed by scheduler.Scheduler
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scheduled_transfers(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            receiver INTEGER,
+            amount INTEGER,
+            currency TEXT,
+            to_currency TEXT,
+            description TEXT,
+            frequency TEXT,
+            status TEXT,
+            next_run_at TEXT,
+            created_at TEXT,
+            runs INTEGER DEFAULT 0,
+            failures INTEGER DEFAULT 0,
+            last_run_at TEXT,
+            last_status TEXT,
+            last_error TEXT,
+            last_tx_id INTEGER
+        )
+    """)
+    # The due queue: active orders in run order, so a batch is an index range scan
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_scheduled_due "
+                 "ON scheduled_transfers(status, next_run_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_scheduled_user "
+                 "ON scheduled_transfers(user_id)")
+
+
+def _m013_transfer_limits(conn):
+    # Limit tier per account and the rolling-window usage kept by limits.Limiter
+    conn.execute("ALTER TABLE users ADD COLUMN limit_tier TEXT DEFAULT 'STANDARD'")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS limit_usage(
+            user_id INTEGER,
+            bucket INTEGER,
+            amount INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, bucket)
+        ) WITHOUT ROWID
+    """)
+    # Seed the window with the last day of transfers valued in INR.  Times are
+    # local ISO strings, so the 15-minute buckets are computed here, not in SQL.
+    since = (datetime.now() - timedelta(days=1)).isoformat()
+    usage = {}
+    for sender, when, amount in conn.execute("""
+        SELECT t.sender, t.time, CAST(ROUND(t.amount * COALESCE(r.inr_per_unit, 1)) AS INTEGER)
+        FROM transactions t
+        LEFT JOIN exchange_rates r ON r.code = t.currency
+            AND r.version = (SELECT MAX(version) FROM rate_versions)
+        WHERE t.type = 'TRANSFER' AND t.sender IS NOT NULL AND t.time >= ?
+    """, (since,)).fetchall():
+        key = (sender, int(datetime.fromisoformat(when).timestamp() // 900))
+        usage[key] = usage.get(key, 0) + amount
+    conn.executemany("INSERT INTO limit_usage (user_id, bucket, amount) VALUES (?, ?, ?)",
+                     [(*key, amount) for key, amount in usage.items()])
+
+
+def _m014_risk_assessments(conn):
+    # Scores of FLAGGED and HELD movements, kept by risk.RiskScorer
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS risk_assessments(
+            tx_id INTEGER PRIMARY KEY,
+            score INTEGER,
+            reasons TEXT,
+            features TEXT,
+            created_at TEXT
+        )
+    """)
+    # The review queue; partial, so it only ever holds the few HELD rows
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_held "
+                 "ON transactions(time) WHERE status = 'HELD'")
+
+
+def _m015_id_sequences(conn):
+    # Serial counters that ids.Sequence reserves blocks from
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS id_sequences(
+            name TEXT PRIMARY KEY,
+            next_value INTEGER DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    conn.executemany("INSERT OR IGNORE INTO id_sequences (name, next_value) VALUES (?, 0)",
+                     [("account",), ("card",)])
+
+
+# Append only: step N brings the database to user_version N.
+MIGRATIONS = [
+    _m001_initial_schema,
+    _m002_transaction_indexes,
+    _m003_daily_user_totals,
+    _m004_wallet_counters,
+    _m005_jobs,
+    _m006_otps,
+    _m007_notifications,
+    _m008_exchange_rates,
+    _m009_currency_wallets,
+    _m010_integer_minor_units,
+    _m011_journal,
+    _m012_scheduled_transfers,
+    _m013_transfer_limits,
+    _m014_risk_assessments,
+    _m015_id_sequences,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn):
+    """Bring the database up to ``SCHEMA_VERSION`` and return the version."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return version
+
+    # Persistent for the database file; must run outside a transaction.
+    conn.execute("PRAGMA journal_mode=WAL")
+
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            if conn.execute("PRAGMA user_version").fetchone()[0] < target:
+                MIGRATIONS[target - 1](conn)
+                conn.execute(f"PRAGMA user_version={target}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    return SCHEMA_VERSION
@@ -0,0 +1,131 @@
+"""Account and card number allocation for United Union Bank.
+
+Numbers are never drawn at random.  Each process reserves a block of serials
+from its row in ``id_sequences`` with one short write and hands them out from
+memory, so concurrent signups in any number of processes get distinct
+serials without retries or UNIQUE constraint errors.  A serial is spread over
+its number space by an affine permutation (a bijection, so it cannot
+collide) to keep numbers from revealing how many accounts exist, then a
+check is appended:
+
+* account numbers are ``UU`` + 8 digits + 2 ISO 7064 MOD 97-10 check digits,
+  the scheme IBANs use, which catches every single-digit error and
+  transposition of adjacent digits;
+* card numbers are 16 digits on our own IIN with a Luhn check digit.
+
+Numbers issued before this module existed (8-digit accounts, cards on the
+4111 prefix) have different shapes, so new numbers cannot clash with them.
+"""
+import threading
+
+from ledger import immediate
+
+BLOCK_SIZE = 100
+
+ACCOUNT, CARD = "account", "card"
+
+ACCOUNT_PREFIX = "UU"
+ACCOUNT_DIGITS = 8
+CARD_IIN = "424242"
+CARD_DIGITS = 9
+
+# (multiplier, offset) per sequence; multipliers are coprime with 10
+_PERMUTATIONS = {
+    ACCOUNT: (48_271_213, 31_415_926),
+    CARD: (777_767_777, 271_828_182),
+}
+_SPACE = {ACCOUNT: 10 ** ACCOUNT_DIGITS, CARD: 10 ** CARD_DIGITS}
+
+
+class IdError(Exception):
+    """Raised when a sequence is exhausted or missing."""
+
+
+# ---------------- CHECK DIGITS ----------------
+def mod97_check(digits):
+    """Two ISO 7064 MOD 97-10 check digits for a digit string."""
+    return f"{98 - int(digits) * 100 % 97:02d}"
+
+
+def valid_account_number(number):
+    body = number.removeprefix(ACCOUNT_PREFIX)
+    return (number.startswith(ACCOUNT_PREFIX) and len(body) == ACCOUNT_DIGITS + 2
+            and body.isdigit() and int(body) % 97 == 1)
+
+
+def luhn_digit(digits):
+    """The Luhn check digit to append to a digit string."""
+    total = 0
+    for i, d in enumerate(reversed(digits)):
+        d = int(d)
+        if i % 2 == 0:
+            d = d * 2 - 9 if d > 4 else d * 2
+        total += d
+    return str(-total % 10)
+
+
+def luhn_valid(number):
+    digits = number.replace(" ", "")
+    return digits.isdigit() and luhn_digit(digits[:-1]) == digits[-1]
+
+
+# ---------------- ALLOCATION ----------------
+def permute(name, serial):
+    """Spread ``serial`` over the sequence's number space; a bijection."""
+    multiplier, offset = _PERMUTATIONS[name]
+    space = _SPACE[name]
+    if not 0 <= serial < space:
+        raise IdError(f"The {name} sequence is exhausted")
+    return (serial * multiplier + offset) % space
+
+
+class Sequence:
+    """Serials from one ``id_sequences`` row, reserved ``block_size`` at a time.
+
+    ``connection`` is a zero-argument callable returning a context manager
+    that yields a sqlite3 connection, e.g. ``ConnectionPool.connection``.
+    Serials left in a block when the process exits are never issued.
+    """
+
+    def __init__(self, connection, name, block_size=BLOCK_SIZE):
+        self.connection = connection
+        self.name = name
+        self.block_size = block_size
+        self._next = self._end = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        with self.connection() as conn, immediate(conn):
+            cur = conn.execute("UPDATE id_sequences SET next_value = next_value + ? WHERE name = ?",
+                               (self.block_size, self.name))
+            if cur.rowcount != 1:
+                raise IdError(f"No sequence named {self.name!r}")
+            (end,) = conn.execute("SELECT next_value FROM id_sequences WHERE name = ?",
+                                  (self.name,)).fetchone()
+        self._next, self._end = end - self.block_size, end
+
+    def next(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._reserve()
+            serial = self._next
+            self._next += 1
+        return serial
+
+
+class IdAllocator:
+    """Issues account and card numbers for this process."""
+
+    def __init__(self, connection, block_size=BLOCK_SIZE):
+        self.accounts = Sequence(connection, ACCOUNT, block_size)
+        self.cards = Sequence(connection, CARD, block_size)
+
+    def account_number(self):
+        body = f"{permute(ACCOUNT, self.accounts.next()):0{ACCOUNT_DIGITS}d}"
+        return f"{ACCOUNT_PREFIX}{body}{mod97_check(body)}"
+
+    def card_number(self):
+        """A Luhn-valid card number, grouped in fours."""
+        digits = f"{CARD_IIN}{permute(CARD, self.cards.next()):0{CARD_DIGITS}d}"
+        digits += luhn_digit(digits)
+        return " ".join(digits[i:i + 4] for i in range(0, 16, 4))
@@ -0,0 +1,154 @@
+"""Background document jobs for United Union Bank.
+
+Statement PDFs and CSV exports can take seconds to minutes for long date
+ranges.  Instead of rendering inside the Streamlit script thread, the page
+records a job in the ``jobs`` table and hands its id to a process pool.  The
+worker process opens its own connection, renders the document, stores the
+artifact on the job row and marks it DONE (or FAILED with the error).  Users
+poll the table from the "My Documents" page.  Finished jobs, artifacts
+included, are deleted after ``RETENTION_DAYS``.
+"""
+import json
+import multiprocessing
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import database
+import queries
+from workers import start_periodic
+
+QUEUED, RUNNING, DONE, FAILED = "QUEUED", "RUNNING", "DONE", "FAILED"
+
+RETENTION_DAYS = 7
+PURGE_INTERVAL = 3600
+
+
+# ---------------- RENDERERS ----------------
+def _statement_pdf(conn, user_id, params):
+    from statements import render_statement
+
+    start, end = date.fromisoformat(params["start"]), date.fromisoformat(params["end"])
+    user = conn.execute("SELECT * FROM users WHERE id=?", (user_id,)).fetchone()
+    data, _ = render_statement(user, queries.statement_rows(conn, user_id, start, end),
+                               start, end)
+    return data, f"UU_Statement_{start}_{end}.pdf", "application/pdf"
+
+
+def _statement_csv(conn, user_id, params):
+    from statements import render_csv
+
+    start, end = date.fromisoformat(params["start"]), date.fromisoformat(params["end"])
+    data, _ = render_csv(queries.statement_rows(conn, user_id, start, end))
+    return data, f"UU_Transactions_{start}_{end}.csv", "text/csv"
+
+
+RENDERERS = {
+    "statement_pdf": _statement_pdf,
+    "statement_csv": _statement_csv,
+}
+
+
+def run_job(db_path, job_id):
+    """Execute one job.  Runs in a pool worker process."""
+    conn = database.connect(db_path)
+    try:
+        cur = conn.execute("UPDATE jobs SET status=?, started_at=? WHERE id=? AND status=?",
+                           (RUNNING, datetime.now().isoformat(), job_id, QUEUED))
+        conn.commit()
+        if cur.rowcount != 1:
+            return  # Picked up elsewhere or cancelled
+        user_id, kind, params = conn.execute(
+            "SELECT user_id, kind, params FROM jobs WHERE id=?", (job_id,)).fetchone()
+        try:
+            data, file_name, mime = RENDERERS[kind](conn, user_id, json.loads(params))
+        except Exception:
+            conn.execute("UPDATE jobs SET status=?, error=?, finished_at=? WHERE id=?",
+                         (FAILED, traceback.format_exc(limit=3), datetime.now().isoformat(),
+                          job_id))
+        else:
+            conn.execute("""
+                UPDATE jobs SET status=?, artifact=?, file_name=?, mime=?, finished_at=?
+                WHERE id=?
+            """, (DONE, data, file_name, mime, datetime.now().isoformat(), job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# ---------------- RUNNER ----------------
+class JobRunner:
+    """Owns the process pool and the submit/list/fetch operations."""
+
+    def __init__(self, db_path=database.DB_PATH, max_workers=None):
+        self.db_path = db_path
+        # Spawn rather than fork: the Streamlit server process is multithreaded
+        self._pool = ProcessPoolExecutor(max_workers=max_workers,
+                                         mp_context=multiprocessing.get_context("spawn"))
+        self._purger = None
+        self._stop = threading.Event()
+
+    def resume(self, conn):
+        """Requeue jobs left QUEUED or RUNNING by a previous process."""
+        conn.execute("UPDATE jobs SET status=? WHERE status=?", (QUEUED, RUNNING))
+        conn.commit()
+        for (job_id,) in conn.execute("SELECT id FROM jobs WHERE status=?", (QUEUED,)).fetchall():
+            self._pool.submit(run_job, self.db_path, job_id)
+
+    def submit(self, conn, user_id, kind, params):
+        if kind not in RENDERERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        cur = conn.execute("""
+            INSERT INTO jobs (user_id, kind, params, status, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (user_id, kind, json.dumps(params), QUEUED, datetime.now().isoformat()))
+        conn.commit()
+        self._pool.submit(run_job, self.db_path, cur.lastrowid)
+        return cur.lastrowid
+
+    @staticmethod
+    def purge(conn, days=RETENTION_DAYS):
+        """Delete jobs that finished more than ``days`` ago; returns how many."""
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        cur = conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                           (DONE, FAILED, cutoff))
+        conn.commit()
+        return cur.rowcount
+
+    def start_purger(self, connection, interval=PURGE_INTERVAL, days=RETENTION_DAYS):
+        """Purge on a background thread every ``interval`` seconds.
+
+        ``connection`` is a zero-argument callable returning a context
+        manager that yields a sqlite3 connection.
+        """
+        if self._purger is not None:
+            return
+
+        def purge():
+            with connection() as conn:
+                self.purge(conn, days)
+
+        purge()
+        self._purger = start_periodic("job-purger", interval, self._stop, purge)
+
+    @staticmethod
+    def list_jobs(conn, user_id, limit=20):
+        """Newest jobs first as (id, kind, status, created_at, finished_at, file_name, error)."""
+        return conn.execute("""
+            SELECT id, kind, status, created_at, finished_at, file_name, error
+            FROM jobs WHERE user_id = ?
+            ORDER BY created_at DESC LIMIT ?
+        """, (user_id, limit)).fetchall()
+
+    @staticmethod
+    def artifact(conn, user_id, job_id):
+        """(data, file_name, mime) of a finished job owned by ``user_id``, or None."""
+        return conn.execute("""
+            SELECT artifact, file_name, mime FROM jobs
+            WHERE id = ? AND user_id = ? AND status = ?
+        """, (job_id, user_id, DONE)).fetchone()
+
+    def shutdown(self):
+        self._stop.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
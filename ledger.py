@@ -0,0 +1,443 @@
+"""Money movement for United Union Bank.
+
+Every operation here runs as one ``BEGIN IMMEDIATE`` transaction: balances are
+changed with relative ``balance = balance + ?`` updates, the overdraft check is
+part of the debit statement itself and the transaction row is inserted before
+the single commit.  Concurrent sessions therefore never lose an update and each
+movement costs exactly one fsync.
+
+Every movement is also written to ``journal_entries`` as balanced double-entry
+lines (see ``journal_lines``), and the wallet balances are moved by applying
+exactly those lines, so ``wallets.balance`` is always the running sum of the
+user's wallet lines.  ``reconcile.Reconciler`` checks that it stays so.
+
+A movement scored as risky (see ``risk.RiskScorer``) is either posted with
+status FLAGGED, or recorded as HELD: the row exists but nothing has moved
+until ``release`` applies it or ``reject`` closes it.
+
+Amounts are integers in minor units (paise for INR, cents for USD, ...), so
+balances and rollups are exact; ``to_minor`` and ``to_major`` convert at the
+edges.  Wallets are keyed by (user, currency).  A transfer debits the sender's wallet
+in one currency and, when the receiver is paid in another, credits them the
+amount converted with the caller's ``RateTable``.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+
+
+class LedgerError(Exception):
+    """Raised when a money movement cannot be applied."""
+
+
+class InsufficientFunds(LedgerError):
+    """Raised when the sender's balance does not cover a transfer."""
+
+
+class TransactionHeld(LedgerError):
+    """Raised after a movement was recorded as HELD for review instead of applied."""
+
+    def __init__(self, tx_id, reasons=()):
+        super().__init__("Held for review")
+        self.tx_id = tx_id
+        self.reasons = list(reasons)
+
+
+BASE_CURRENCY = "INR"
+
+# Transaction statuses.  Only COMPLETED and FLAGGED rows have moved money.
+COMPLETED, FLAGGED, HELD, REJECTED = "COMPLETED", "FLAGGED", "HELD", "REJECTED"
+
+# Journal accounts.  Wallet lines carry a user_id; the others are the bank's
+# own books: money entering or leaving the bank, currency exchange and the
+# opening balances that predate the journal.
+WALLET, CASH, FX, EQUITY = "wallet", "cash", "fx", "equity"
+
+# Minor units per major unit; every supported currency has two decimals
+MINOR_UNITS = 100
+
+
+def to_minor(amount):
+    """Major units (12.34, "12.34" or a Decimal) to integer minor units, half up."""
+    return int((Decimal(str(amount)) * MINOR_UNITS).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def to_major(minor):
+    """Integer minor units as an exact Decimal in major units, for display."""
+    return Decimal(minor) / MINOR_UNITS
+
+
+def _check_amount(amount):
+    if not isinstance(amount, int):
+        raise LedgerError(f"Amounts are integer minor units, got {amount!r}")
+    if amount <= 0:
+        raise LedgerError("Amount must be positive")
+
+
+@contextmanager
+def immediate(conn):
+    """Run the enclosed statements in a single write transaction."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+def open_wallet(conn, user_id, currency=BASE_CURRENCY, now=None):
+    """Create the user's wallet in ``currency`` if they do not have one yet."""
+    conn.execute("INSERT OR IGNORE INTO wallets (user_id, currency, last_updated) "
+                 "VALUES (?, ?, ?)", (user_id, currency, now or datetime.now().isoformat()))
+
+
+def _credit(conn, user_id, amount, now, currency=BASE_CURRENCY, open_missing=False):
+    sql = ("UPDATE wallets SET balance = balance + ?, last_updated = ? "
+           "WHERE user_id = ? AND currency = ?")
+    params = (amount, now, user_id, currency)
+    cur = conn.execute(sql, params)
+    if cur.rowcount != 1 and open_missing:
+        # First credit in this currency; the common case costs no extra write
+        open_wallet(conn, user_id, currency, now)
+        cur = conn.execute(sql, params)
+    if cur.rowcount != 1:
+        raise LedgerError(f"No {currency} wallet for user {user_id}")
+
+
+def _debit(conn, user_id, amount, now, currency=BASE_CURRENCY):
+    cur = conn.execute(
+        "UPDATE wallets SET balance = balance - ?, last_updated = ? "
+        "WHERE user_id = ? AND currency = ? AND balance >= ?",
+        (amount, now, user_id, currency, amount))
+    if cur.rowcount != 1:
+        if conn.execute("SELECT 1 FROM wallets WHERE user_id = ? AND currency = ?",
+                        (user_id, currency)).fetchone():
+            raise InsufficientFunds("Insufficient funds")
+        raise LedgerError(f"No {currency} wallet for user {user_id}")
+
+
+def record(conn, sender, receiver, amount, trans_type, description="", now=None,
+           status=COMPLETED, currency=BASE_CURRENCY, credit_amount=None,
+           credit_currency=None):
+    """Insert a transactions row and fold it into the derived tables.
+
+    ``amount`` is in ``currency``; ``credit_amount``/``credit_currency`` give
+    the receiver's side when it differs.  Updates ``daily_user_totals`` and
+    the counters on each party's wallet, except for a HELD row, which
+    ``release`` folds in later.  Must run inside the caller's transaction;
+    returns the new row id.
+    """
+    now = now or datetime.now().isoformat()
+    cur = conn.execute("""
+        INSERT INTO transactions
+        (sender, receiver, amount, type, description, time, status, currency,
+         credit_amount, credit_currency)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (sender, receiver, amount, trans_type, description, now, status, currency,
+          credit_amount, credit_currency))
+    if status != HELD:
+        _fold(conn, sender, receiver, amount, trans_type, now, currency, credit_amount,
+              credit_currency)
+    return cur.lastrowid
+
+
+def _fold(conn, sender, receiver, amount, trans_type, now, currency, credit_amount,
+          credit_currency):
+    # Each party's side of the movement: (user, currency, amount)
+    sides = []
+    if sender is not None:
+        sides.append((sender, currency, amount))
+    if receiver is not None and receiver != sender:
+        sides.append((receiver, credit_currency or currency,
+                      amount if credit_amount is None else credit_amount))
+    conn.executemany("""
+        INSERT INTO daily_user_totals (user_id, currency, day, type, total, count)
+        VALUES (?, ?, ?, ?, ?, 1)
+        ON CONFLICT (user_id, currency, day, type)
+        DO UPDATE SET total = total + excluded.total, count = count + 1
+    """, [(p, c, now[:10], trans_type, a) for p, c, a in sides])
+
+    counters = []
+    for p, c, a in sides:
+        deposit = a if trans_type == "DEPOSIT" else 0
+        moved = a if trans_type == "TRANSFER" else 0
+        deltas = (0, moved, 0) if p == sender else (deposit, 0, moved)
+        counters.append((*deltas, p, c))
+    conn.executemany("""
+        UPDATE wallets SET tx_count = tx_count + 1,
+            lifetime_deposits = lifetime_deposits + ?,
+            lifetime_transfers_out = lifetime_transfers_out + ?,
+            lifetime_transfers_in = lifetime_transfers_in + ?
+        WHERE user_id = ? AND currency = ?
+    """, counters)
+
+
+def journal_lines(sender, receiver, amount, currency=BASE_CURRENCY, credit_amount=None,
+                  credit_currency=None):
+    """Balanced lines for a movement as (user_id, account, currency, amount).
+
+    Lines are signed (negative debits the account) and sum to zero per
+    currency.  A missing sender or receiver is the bank's cash account, and a
+    conversion goes through the FX account in both currencies.
+    """
+    credit_currency = credit_currency or currency
+    credit_amount = amount if credit_amount is None else credit_amount
+    lines = [(sender, WALLET, currency, -amount) if sender is not None
+             else (None, CASH, currency, -amount)]
+    if credit_currency != currency:
+        lines.append((None, FX, currency, amount))
+        lines.append((None, FX, credit_currency, -credit_amount))
+    lines.append((receiver, WALLET, credit_currency, credit_amount) if receiver is not None
+                 else (None, CASH, credit_currency, credit_amount))
+    return lines
+
+
+def _apply(conn, lines, now):
+    # Debits first, so an overdraft raises before anything is credited
+    for user_id, account, code, delta in sorted(lines, key=lambda line: line[3]):
+        if account != WALLET:
+            continue
+        if delta < 0:
+            _debit(conn, user_id, -delta, now, code)
+        else:
+            _credit(conn, user_id, delta, now, code, open_missing=True)
+
+
+def _journal(conn, tx_id, lines, now):
+    conn.executemany("""
+        INSERT INTO journal_entries (tx_id, user_id, account, currency, amount, time)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(tx_id, *line, now) for line in lines])
+
+
+def post(conn, sender, receiver, amount, trans_type, description="", now=None,
+         currency=BASE_CURRENCY, credit_amount=None, credit_currency=None, status=COMPLETED):
+    """Apply a movement to the wallets, record it and journal it.
+
+    Debit lines are applied first, so an overdraft raises ``InsufficientFunds``
+    before anything is credited.  A HELD movement is only recorded, once the
+    sender is known to cover it.  Must run inside the caller's transaction;
+    returns the transactions row id.
+    """
+    now = now or datetime.now().isoformat()
+    if status == HELD:
+        if sender is not None and _balance(conn, sender, currency) < amount:
+            raise InsufficientFunds("Insufficient funds")
+        return record(conn, sender, receiver, amount, trans_type, description, now, HELD,
+                      currency, credit_amount, credit_currency)
+    lines = journal_lines(sender, receiver, amount, currency, credit_amount, credit_currency)
+    _apply(conn, lines, now)
+    tx_id = record(conn, sender, receiver, amount, trans_type, description, now, status,
+                   currency, credit_amount, credit_currency)
+    _journal(conn, tx_id, lines, now)
+    return tx_id
+
+
+def release(conn, tx_id):
+    """Apply a HELD movement as it was recorded and mark it COMPLETED.
+
+    Raises ``InsufficientFunds`` if the sender can no longer cover it; the
+    row then stays HELD.  Must run inside the caller's transaction.
+    """
+    row = conn.execute("""
+        SELECT sender, receiver, amount, type, time, currency, credit_amount, credit_currency
+        FROM transactions WHERE id = ? AND status = ?
+    """, (tx_id, HELD)).fetchone()
+    if row is None:
+        raise LedgerError(f"Transaction {tx_id} is not held")
+    sender, receiver, amount, trans_type, when, currency, credit_amount, credit_currency = row
+    lines = journal_lines(sender, receiver, amount, currency, credit_amount, credit_currency)
+    _apply(conn, lines, datetime.now().isoformat())
+    _fold(conn, sender, receiver, amount, trans_type, when, currency, credit_amount,
+          credit_currency)
+    _journal(conn, tx_id, lines, when)
+    conn.execute("UPDATE transactions SET status = ? WHERE id = ?", (COMPLETED, tx_id))
+
+
+def reject(conn, tx_id):
+    """Close a HELD movement without applying it."""
+    cur = conn.execute("UPDATE transactions SET status = ? WHERE id = ? AND status = ?",
+                       (REJECTED, tx_id, HELD))
+    if cur.rowcount != 1:
+        raise LedgerError(f"Transaction {tx_id} is not held")
+
+
+def post_batch(conn, sender, credits, trans_type, now=None, currency=BASE_CURRENCY,
+               status=COMPLETED):
+    """Bulk ``post`` of many same-currency movements from one sender.
+
+    ``credits`` is a list of (receiver, amount, description); ``sender`` is a
+    user id or None for money entering the bank.  The sender is debited once
+    for the total, so ``InsufficientFunds`` rejects the whole batch.  Every
+    other write is one ``executemany``.  ``status`` is COMPLETED or FLAGGED;
+    HELD movements go through ``post`` one by one.  Must run inside the
+    caller's transaction; returns the new transactions row ids in order.
+    """
+    if status == HELD:
+        raise LedgerError("post_batch cannot record HELD movements")
+    now = now or datetime.now().isoformat()
+    total = sum(amount for _, amount, _ in credits)
+    if sender is not None:
+        _debit(conn, sender, total, now, currency)
+    receivers = {receiver for receiver, _, _ in credits}
+    conn.executemany("INSERT OR IGNORE INTO wallets (user_id, currency, last_updated) "
+                     "VALUES (?, ?, ?)", [(r, currency, now) for r in receivers])
+    conn.executemany("UPDATE wallets SET balance = balance + ?, last_updated = ? "
+                     "WHERE user_id = ? AND currency = ?",
+                     [(amount, now, receiver, currency) for receiver, amount, _ in credits])
+
+    # The write lock is held, so the next ids are ours to assign
+    last_id = conn.execute("""
+        SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'transactions'), 0),
+                   COALESCE((SELECT MAX(id) FROM transactions), 0))
+    """).fetchone()[0]
+    ids = list(range(last_id + 1, last_id + 1 + len(credits)))
+    conn.executemany("""
+        INSERT INTO transactions
+        (id, sender, receiver, amount, type, description, time, status, currency)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(tx_id, sender, receiver, amount, trans_type, description, now, status, currency)
+          for tx_id, (receiver, amount, description) in zip(ids, credits)])
+
+    # Fold into the rollups per party rather than per row
+    totals = {}
+    for receiver, amount, _ in credits:
+        count, subtotal = totals.get(receiver, (0, 0))
+        totals[receiver] = (count + 1, subtotal + amount)
+    conn.executemany("""
+        INSERT INTO daily_user_totals (user_id, currency, day, type, total, count)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, currency, day, type)
+        DO UPDATE SET total = total + excluded.total, count = count + excluded.count
+    """, [(p, currency, now[:10], trans_type, subtotal, count)
+          for p, (count, subtotal) in totals.items()]
+        + ([(sender, currency, now[:10], trans_type, total, len(credits))]
+           if sender is not None else []))
+    moved = trans_type == "TRANSFER"
+    counters = [(count, 0 if moved else subtotal, 0, subtotal if moved else 0, p, currency)
+                for p, (count, subtotal) in totals.items()]
+    if sender is not None:
+        counters.append((len(credits), 0, total if moved else 0, 0, sender, currency))
+    conn.executemany("""
+        UPDATE wallets SET tx_count = tx_count + ?,
+            lifetime_deposits = lifetime_deposits + ?,
+            lifetime_transfers_out = lifetime_transfers_out + ?,
+            lifetime_transfers_in = lifetime_transfers_in + ?
+        WHERE user_id = ? AND currency = ?
+    """, counters)
+
+    conn.executemany("""
+        INSERT INTO journal_entries (tx_id, user_id, account, currency, amount, time)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(tx_id, *line, now)
+          for tx_id, (receiver, amount, _) in zip(ids, credits)
+          for line in journal_lines(sender, receiver, amount, currency)])
+    return ids
+
+
+def _balance(conn, user_id, currency=BASE_CURRENCY):
+    row = conn.execute("SELECT balance FROM wallets WHERE user_id = ? AND currency = ?",
+                       (user_id, currency)).fetchone()
+    return row[0] if row else 0
+
+
+def deposit(conn, user_id, amount, description="", currency=BASE_CURRENCY, rates=None,
+            risk=None):
+    """Credit ``amount`` to the user's ``currency`` wallet and return the new balance.
+
+    The wallet is opened on the first deposit in a currency.  ``risk`` is an
+    optional ``risk.RiskScorer``; a deposit it holds raises ``TransactionHeld``
+    once recorded.
+    """
+    _check_amount(amount)
+    now = datetime.now().isoformat()
+    assessment = None
+    status = COMPLETED
+    if risk is not None:
+        assessment = risk.assess(user_id, "DEPOSIT", amount, currency, rates)
+        status = assessment["status"]
+    with immediate(conn):
+        tx_id = post(conn, None, user_id, amount, "DEPOSIT", description, now, currency=currency,
+                     status=status)
+        if assessment is not None:
+            risk.persist(conn, tx_id, assessment)
+        balance = _balance(conn, user_id, currency)
+    if assessment is not None:
+        risk.observe(assessment)
+    if status == HELD:
+        raise TransactionHeld(tx_id, assessment["reasons"])
+    return balance
+
+
+def post_transfer(conn, sender_id, receiver_id, amount, description="", now=None,
+                  currency=BASE_CURRENCY, to_currency=None, rates=None, status=COMPLETED):
+    """The body of ``transfer`` without its transaction, for callers that batch.
+
+    Must run inside the caller's transaction; returns the transactions row id.
+    """
+    _check_amount(amount)
+    if sender_id == receiver_id:
+        raise LedgerError("Cannot transfer to yourself")
+    credit_amount = credit_currency = None
+    if to_currency and to_currency != currency:
+        if rates is None:
+            raise LedgerError("Exchange rates are required for a cross-currency transfer")
+        credit_currency = to_currency
+        credit_amount = round(amount * rates.rate(currency, to_currency))
+        if credit_amount <= 0:
+            raise LedgerError(f"Amount is below one minor unit of {to_currency}")
+    return post(conn, sender_id, receiver_id, amount, "TRANSFER", description, now,
+                currency=currency, credit_amount=credit_amount, credit_currency=credit_currency,
+                status=status)
+
+
+def transfer(conn, sender_id, receiver_id, amount, description="", currency=BASE_CURRENCY,
+             to_currency=None, rates=None, limits=None, risk=None):
+    """Move ``amount`` from the sender's ``currency`` wallet to the receiver.
+
+    The receiver is credited in ``to_currency`` (default: the same currency),
+    converted with ``rates`` (a ``currency.RateTable``) and rounded to the
+    nearest minor unit; their wallet in that currency is opened if needed.
+    Returns the sender's new balance.  Raises ``InsufficientFunds`` when the
+    sender cannot cover the amount; nothing is written in that case.
+
+    ``limits`` is an optional ``limits.Limiter``; the amount is counted
+    against the sender's limits first and the usage is saved with the
+    transfer, or ``limits.LimitExceeded`` is raised.  ``risk`` is an
+    optional ``risk.RiskScorer`` deciding the status; a transfer it holds
+    raises ``TransactionHeld`` once recorded, and counts against the limits
+    only when it is released (``risk.review``).
+    """
+    _check_amount(amount)
+    reservation = assessment = None
+    status = COMPLETED
+    if limits is not None:
+        reservation = limits.reserve(sender_id, amount, currency, rates)
+    try:
+        if risk is not None:
+            assessment = risk.assess(sender_id, "TRANSFER", amount, currency, rates, receiver_id)
+            status = assessment["status"]
+        if status == HELD and reservation is not None:
+            limits.release(reservation)
+            reservation = None
+        with immediate(conn):
+            tx_id = post_transfer(conn, sender_id, receiver_id, amount, description, None,
+                                  currency, to_currency, rates, status)
+            if reservation is not None:
+                limits.persist(conn, reservation)
+            if assessment is not None:
+                risk.persist(conn, tx_id, assessment)
+            balance = _balance(conn, sender_id, currency)
+    except BaseException:
+        if reservation is not None:
+            limits.release(reservation)
+        raise
+    if reservation is not None:
+        limits.settle(reservation)
+    if assessment is not None:
+        risk.observe(assessment)
+    if status == HELD:
+        raise TransactionHeld(tx_id, assessment["reasons"])
+    return balance
@@ -0,0 +1,255 @@
+"""Transfer limits for United Union Bank.
+
+Every account has a limit tier giving a per-transaction cap and a cap on the
+total sent over any rolling 24 hours, both in INR minor units.  ``Limiter``
+keeps each sender's last 24 hours as a ring of 15-minute buckets with a
+running total, so a check is a comparison against that total rather than a
+SUM over the user's transactions.
+
+A transfer reserves its amount in memory before it is posted (two sessions
+of the same user cannot both squeeze under the cap) and writes the bucket to
+the compact ``limit_usage`` table inside the transfer's own transaction.
+The table holds at most a day of buckets per sender.  A window older than
+``RELOAD_SECONDS`` is re-read from it, with the tier, so usage written by
+other processes (``risk.py release``, ``scheduler.py``) and tier changes
+made with this module's CLI reach the app within that time.  Reservations
+not yet committed are carried over a reload.  At most ``MAX_WINDOWS``
+senders are kept, least recently used first out.
+"""
+import argparse
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+
+import database
+from ledger import BASE_CURRENCY, LedgerError, to_major
+
+STANDARD, PREMIUM, BUSINESS = "STANDARD", "PREMIUM", "BUSINESS"
+
+# Tier -> caps in INR paise
+TIERS = {
+    STANDARD: {"per_transaction": 2_500_000, "daily": 5_000_000},
+    PREMIUM: {"per_transaction": 10_000_000, "daily": 50_000_000},
+    BUSINESS: {"per_transaction": 100_000_000, "daily": 500_000_000},
+}
+
+WINDOW_SECONDS = 86400
+BUCKET_SECONDS = 900
+BUCKETS = WINDOW_SECONDS // BUCKET_SECONDS
+RELOAD_SECONDS = 30
+MAX_WINDOWS = 10_000
+
+
+class LimitExceeded(LedgerError):
+    """Raised when a transfer is above the sender's per-transaction or daily limit."""
+
+
+class _Reservation:
+    """An amount counted in memory; ``settled_at`` is set once it is committed."""
+
+    __slots__ = ("user_id", "bucket", "amount", "settled_at")
+
+    def __init__(self, user_id, bucket, amount):
+        self.user_id = user_id
+        self.bucket = bucket
+        self.amount = amount
+        self.settled_at = None
+
+
+class _Window:
+    """One sender's rolling 24 hours: ``BUCKETS`` amounts and their sum."""
+
+    __slots__ = ("tier", "head", "total", "amounts", "loaded_at", "pending")
+
+    def __init__(self, tier, head, loaded_at):
+        self.tier = tier
+        self.head = head
+        self.total = 0
+        self.amounts = [0] * BUCKETS
+        self.loaded_at = loaded_at
+        # Reservations the last read may not include
+        self.pending = []
+
+    def advance(self, bucket):
+        """Expire the buckets that fell out of the window by ``bucket``."""
+        if bucket <= self.head:
+            return
+        if bucket - self.head >= BUCKETS:
+            self.amounts = [0] * BUCKETS
+            self.total = 0
+        else:
+            for b in range(self.head + 1, bucket + 1):
+                self.total -= self.amounts[b % BUCKETS]
+                self.amounts[b % BUCKETS] = 0
+        self.head = bucket
+
+    def add(self, bucket, amount):
+        self.amounts[bucket % BUCKETS] += amount
+        self.total += amount
+
+
+class Limiter:
+    """``connection`` is a zero-argument callable returning a context manager
+    that yields a sqlite3 connection, used to load a user's tier and window
+    the first time they transfer.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _read(self, user_id, bucket):
+        """The sender's tier and buckets as stored, read without the lock held."""
+        started = time.monotonic()
+        with self.connection() as conn:
+            row = conn.execute("SELECT limit_tier FROM users WHERE id = ?", (user_id,)).fetchone()
+            usage = conn.execute("""
+                SELECT bucket, amount FROM limit_usage
+                WHERE user_id = ? AND bucket > ?
+            """, (user_id, bucket - BUCKETS)).fetchall()
+        return (row and row[0]) or STANDARD, usage, started
+
+    def _read_if_stale(self, user_id, bucket):
+        with self._lock:
+            window = self._windows.get(user_id)
+            if window is not None and time.monotonic() - window.loaded_at < RELOAD_SECONDS:
+                return None
+        return self._read(user_id, bucket)
+
+    def _window(self, user_id, bucket, stored=None):
+        """The sender's window, rebuilt from ``stored`` (a ``_read``) if given.
+
+        Must be called with the lock held.
+        """
+        window = self._windows.get(user_id)
+        if window is None and stored is None:
+            # Evicted since the staleness check
+            stored = self._read(user_id, bucket)
+        if stored is not None:
+            tier, usage, started = stored
+            fresh = _Window(tier, bucket, started)
+            for b, amount in usage:
+                if b <= bucket:
+                    fresh.add(b, amount)
+            if window is not None:
+                # Uncommitted, or committed after the read began and maybe missing from it
+                for reservation in window.pending:
+                    if reservation.settled_at is None or reservation.settled_at >= started:
+                        fresh.pending.append(reservation)
+                        if bucket - BUCKETS < reservation.bucket <= bucket:
+                            fresh.add(reservation.bucket, reservation.amount)
+            window = self._windows[user_id] = fresh
+            if len(self._windows) > MAX_WINDOWS:
+                oldest, evicted = self._windows.popitem(last=False)
+                if any(r.settled_at is None for r in evicted.pending):
+                    # Still has a transfer in flight; keep it for now
+                    self._windows[oldest] = evicted
+        self._windows.move_to_end(user_id)
+        window.advance(bucket)
+        return window
+
+    def usage(self, user_id, now=None):
+        """(tier, INR minor units sent in the last 24 hours, caps dict)."""
+        bucket = int((now or time.time()) // BUCKET_SECONDS)
+        stored = self._read_if_stale(user_id, bucket)
+        with self._lock:
+            window = self._window(user_id, bucket, stored)
+            return window.tier, window.total, TIERS[window.tier]
+
+    def reserve(self, user_id, amount, currency=BASE_CURRENCY, rates=None, now=None, check=True):
+        """Count a transfer against the sender's limits or raise ``LimitExceeded``.
+
+        ``amount`` is in minor units of ``currency``, valued in INR with
+        ``rates`` when it is another currency.  Returns a reservation to pass
+        to ``persist`` inside the transfer's transaction and to ``settle``
+        once that commits, or to ``release`` if the transfer does not go
+        through.  ``check=False`` counts a transfer already approved (a
+        released HELD one) without the caps.
+        """
+        if currency != BASE_CURRENCY:
+            if rates is None:
+                raise LedgerError("Exchange rates are required to check a foreign-currency limit")
+            amount = round(amount * rates.rate(currency, BASE_CURRENCY))
+        bucket = int((now or time.time()) // BUCKET_SECONDS)
+        stored = self._read_if_stale(user_id, bucket)
+        with self._lock:
+            window = self._window(user_id, bucket, stored)
+            caps = TIERS[window.tier]
+            if check and amount > caps["per_transaction"]:
+                raise LimitExceeded("Amount is above your per-transaction limit")
+            if check and window.total + amount > caps["daily"]:
+                raise LimitExceeded("Amount would exceed your 24-hour transfer limit")
+            window.add(bucket, amount)
+            reservation = _Reservation(user_id, bucket, amount)
+            window.pending.append(reservation)
+        return reservation
+
+    @staticmethod
+    def persist(conn, *reservations):
+        """Write reservations to ``limit_usage``.  Must run inside the transfers' transaction."""
+        usage = {}
+        for r in reservations:
+            usage[r.user_id, r.bucket] = usage.get((r.user_id, r.bucket), 0) + r.amount
+        conn.executemany("""
+            INSERT INTO limit_usage (user_id, bucket, amount) VALUES (?, ?, ?)
+            ON CONFLICT (user_id, bucket) DO UPDATE SET amount = amount + excluded.amount
+        """, [(user_id, bucket, amount) for (user_id, bucket), amount in usage.items()])
+        # Keep only the window; a primary-key range delete
+        conn.executemany("DELETE FROM limit_usage WHERE user_id = ? AND bucket <= ?",
+                         [(user_id, bucket - BUCKETS) for user_id, bucket in usage])
+
+    def settle(self, *reservations):
+        """Mark persisted reservations as committed, so a reload may drop them."""
+        now = time.monotonic()
+        with self._lock:
+            for reservation in reservations:
+                reservation.settled_at = now
+
+    def release(self, *reservations):
+        """Undo ``reserve`` for transfers that were rolled back."""
+        with self._lock:
+            for reservation in reservations:
+                window = self._windows.get(reservation.user_id)
+                if window is None or reservation not in window.pending:
+                    continue
+                window.pending.remove(reservation)
+                if reservation.bucket > window.head - BUCKETS:
+                    window.amounts[reservation.bucket % BUCKETS] -= reservation.amount
+                    window.total -= reservation.amount
+
+    def set_tier(self, conn, user_id, tier):
+        """Move an account to another tier.  Commits."""
+        if tier not in TIERS:
+            raise ValueError(f"Unknown limit tier: {tier}")
+        conn.execute("UPDATE users SET limit_tier = ? WHERE id = ?", (tier, user_id))
+        conn.commit()
+        with self._lock:
+            window = self._windows.get(user_id)
+            if window is not None:
+                window.tier = tier
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or change an account's transfer limits")
+    parser.add_argument("username")
+    parser.add_argument("--tier", choices=list(TIERS))
+    parser.add_argument("--db", default=database.DB_PATH)
+    args = parser.parse_args()
+
+    conn = database.connect(args.db)
+    database.migrate(conn)
+    row = conn.execute("SELECT id FROM users WHERE username = ?", (args.username,)).fetchone()
+    if row is None:
+        parser.error(f"Unknown user {args.username!r}")
+    limiter = Limiter(lambda: nullcontext(conn))
+    if args.tier:
+        limiter.set_tier(conn, row[0], args.tier)
+    tier, used, caps = limiter.usage(row[0])
+    print(f"{args.username}: {tier}, used {to_major(used):,.2f} of {to_major(caps['daily']):,.2f} "
+          f"{BASE_CURRENCY} in the last 24h, {to_major(caps['per_transaction']):,.2f} per transfer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Outbound notifications for United Union Bank.
+
+Pages never talk to an SMS or WhatsApp provider directly.  ``enqueue`` writes a
+row to the durable ``notifications`` outbox and returns; a ``Dispatcher``
+running an asyncio loop on a background thread claims due rows in batches,
+sends them with a per-provider concurrency limit and retries failures with
+exponential backoff.  Rows left mid-send by a crashed process are picked up
+again on the next start.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+PENDING, SENDING, SENT, FAILED = "PENDING", "SENDING", "SENT", "FAILED"
+
+BATCH_SIZE = 50
+POLL_INTERVAL = 2.0
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
+
+log = logging.getLogger(__name__)
+
+
+def enqueue(conn, channel, recipient, kind, body):
+    """Add a message to the outbox.  Commits; safe to call from any page."""
+    now = time.time()
+    cur = conn.execute("""
+        INSERT INTO notifications
+        (channel, recipient, kind, body, status, attempts, next_attempt_at, created_at)
+        VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+    """, (channel, recipient, kind, body, PENDING, now, now))
+    conn.commit()
+    return cur.lastrowid
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number ``attempts``, with jitter."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE ** attempts)
+    return delay * random.uniform(0.5, 1.0)
+
+
+# ---------------- PROVIDERS ----------------
+class Provider:
+    """Base class for a delivery channel.  ``send`` raises on failure."""
+
+    name = "provider"
+    concurrency = 4
+
+    async def send(self, recipient, body):
+        raise NotImplementedError
+
+
+class FakeProvider(Provider):
+    """Local stand-in that records messages instead of delivering them.
+
+    Only the last ``keep`` messages are kept in ``sent``; they can hold OTP
+    codes, so a long-running process should keep none.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=0.05, failure_rate=0.0, concurrency=4, keep=1000):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.concurrency = concurrency
+        self.sent = deque(maxlen=keep)
+
+    async def send(self, recipient, body):
+        await asyncio.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise RuntimeError("Simulated provider failure")
+        self.sent.append((recipient, body))
+
+
+# ---------------- DISPATCHER ----------------
+class Dispatcher:
+    """Drains the outbox on a background asyncio loop.
+
+    ``connection`` is a zero-argument callable returning a context manager
+    that yields a sqlite3 connection; ``providers`` maps channel name to
+    ``Provider``.
+    """
+
+    def __init__(self, connection, providers, batch_size=BATCH_SIZE,
+                 poll_interval=POLL_INTERVAL, max_attempts=MAX_ATTEMPTS):
+        self.connection = connection
+        self.providers = providers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._loop = None
+        self._wake = None
+        self._limits = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self.connection() as conn:
+            # Messages claimed by a process that died before finishing
+            conn.execute("UPDATE notifications SET status=? WHERE status=?", (PENDING, SENDING))
+            conn.commit()
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._wake = asyncio.Event()
+            ready.set()
+            self._loop.run_until_complete(self._run())
+
+        self._thread = threading.Thread(target=run, name="notify-dispatcher", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def notify(self, conn, channel, recipient, kind, body):
+        """``enqueue`` and wake the dispatcher instead of waiting for its next poll."""
+        row_id = enqueue(conn, channel, recipient, kind, body)
+        self.wake()
+        return row_id
+
+    def wake(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                sent = await self.drain_once()
+            except Exception:
+                log.exception("notify-dispatcher failed; retrying in %ss", self.poll_interval)
+                sent = 0
+            if sent < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _claim(self):
+        now = time.time()
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("""
+                SELECT id, channel, recipient, kind, body, attempts FROM notifications
+                WHERE status = ? AND next_attempt_at <= ?
+                ORDER BY next_attempt_at LIMIT ?
+            """, (PENDING, now, self.batch_size)).fetchall()
+            conn.executemany("UPDATE notifications SET status=? WHERE id=?",
+                             [(SENDING, row[0]) for row in rows])
+            conn.commit()
+        return rows
+
+    def _settle(self, results):
+        now = time.time()
+        updates = []
+        for (row_id, _, _, _, _, attempts), error in results:
+            if error is None:
+                # Never keep a delivered OTP code at rest
+                updates.append(("UPDATE notifications SET status=?, sent_at=?, attempts=?, "
+                                "body=CASE WHEN kind='otp' THEN NULL ELSE body END WHERE id=?",
+                                (SENT, now, attempts + 1, row_id)))
+            elif attempts + 1 >= self.max_attempts:
+                updates.append(("UPDATE notifications SET status=?, attempts=?, last_error=? "
+                                "WHERE id=?", (FAILED, attempts + 1, error, row_id)))
+            else:
+                updates.append(("UPDATE notifications SET status=?, attempts=?, last_error=?, "
+                                "next_attempt_at=? WHERE id=?",
+                                (PENDING, attempts + 1, error, now + backoff(attempts + 1), row_id)))
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for sql, params in updates:
+                conn.execute(sql, params)
+            conn.commit()
+
+    async def _send(self, row):
+        _, channel, recipient, _, body, _ = row
+        provider = self.providers.get(channel)
+        if provider is None:
+            return f"No provider for channel {channel!r}"
+        async with self._limits[channel]:
+            try:
+                await provider.send(recipient, body)
+            except Exception as exc:
+                return f"{type(exc).__name__}: {exc}"
+        return None
+
+    async def drain_once(self):
+        """Send one batch of due messages; return how many were claimed."""
+        if self._limits is None:
+            # Made on first use, inside the loop that waits on them
+            self._limits = {channel: asyncio.Semaphore(p.concurrency)
+                            for channel, p in self.providers.items()}
+        rows = self._claim()
+        if rows:
+            errors = await asyncio.gather(*(self._send(row) for row in rows))
+            self._settle(list(zip(rows, errors)))
+        return len(rows)
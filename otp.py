@@ -0,0 +1,110 @@
+"""One-time password store for United Union Bank.
+
+OTP challenges live in the ``otps`` table rather than in ``st.session_state``,
+so they survive restarts and any app process behind a load balancer can verify
+them.  Only a salted SHA-256 of each code is stored.  A challenge is looked up
+by its random id (the primary key), carries its own attempt counter, and is
+removed by a background sweeper once ``expires_at`` has passed.
+"""
+import hashlib
+import hmac
+import random
+import secrets
+import threading
+import time
+
+from workers import start_periodic
+
+OTP_TTL = 300
+MAX_ATTEMPTS = 5
+SWEEP_INTERVAL = 60
+
+VERIFIED, INVALID, EXPIRED, LOCKED = "VERIFIED", "INVALID", "EXPIRED", "LOCKED"
+
+
+def _digest(salt, code):
+    return hashlib.sha256(salt + code.encode()).digest()
+
+
+class OtpStore:
+    """SQLite-backed OTP store.
+
+    ``connection`` is a zero-argument callable returning a context manager
+    that yields a sqlite3 connection, e.g. ``ConnectionPool.connection``.
+    Another backend only needs to provide the same public methods.
+    """
+
+    def __init__(self, connection, ttl=OTP_TTL, max_attempts=MAX_ATTEMPTS):
+        self.connection = connection
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self._sweeper = None
+        self._stop = threading.Event()
+
+    def issue(self, user_id):
+        """Create a challenge for ``user_id`` and return ``(challenge_id, code)``."""
+        challenge_id = secrets.token_urlsafe(16)
+        code = str(random.SystemRandom().randint(100000, 999999))
+        salt = secrets.token_bytes(16)
+        now = time.time()
+        with self.connection() as conn:
+            conn.execute("""
+                INSERT INTO otps (id, user_id, salt, code_hash, created_at, expires_at, attempts)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+            """, (challenge_id, user_id, salt, _digest(salt, code), now, now + self.ttl))
+            conn.commit()
+        return challenge_id, code
+
+    def verify(self, challenge_id, code):
+        """Check ``code`` against a challenge; a successful check consumes it.
+
+        Returns one of VERIFIED, INVALID, EXPIRED or LOCKED.
+        """
+        with self.connection() as conn:
+            # Count the attempt first so parallel guesses cannot bypass the limit
+            cur = conn.execute("""
+                UPDATE otps SET attempts = attempts + 1
+                WHERE id = ? AND attempts < ?
+            """, (challenge_id, self.max_attempts))
+            conn.commit()
+            row = conn.execute("SELECT salt, code_hash, expires_at FROM otps WHERE id = ?",
+                               (challenge_id,)).fetchone()
+            if row is None:
+                return EXPIRED
+            if cur.rowcount != 1:
+                return LOCKED
+            salt, code_hash, expires_at = row
+            if expires_at <= time.time():
+                return EXPIRED
+            if not hmac.compare_digest(_digest(salt, code or ""), code_hash):
+                return INVALID
+            conn.execute("DELETE FROM otps WHERE id = ?", (challenge_id,))
+            conn.commit()
+            return VERIFIED
+
+    def expires_at(self, challenge_id):
+        """Expiry as a Unix timestamp, or None if the challenge is gone."""
+        with self.connection() as conn:
+            row = conn.execute("SELECT expires_at FROM otps WHERE id = ?",
+                               (challenge_id,)).fetchone()
+        return row[0] if row else None
+
+    def revoke(self, challenge_id):
+        with self.connection() as conn:
+            conn.execute("DELETE FROM otps WHERE id = ?", (challenge_id,))
+            conn.commit()
+
+    def sweep(self):
+        """Delete expired challenges and return how many were removed."""
+        with self.connection() as conn:
+            cur = conn.execute("DELETE FROM otps WHERE expires_at < ?", (time.time(),))
+            conn.commit()
+        return cur.rowcount
+
+    def start_sweeper(self, interval=SWEEP_INTERVAL):
+        if self._sweeper is not None:
+            return
+        self._sweeper = start_periodic("otp-sweeper", interval, self._stop, self.sweep)
+
+    def stop_sweeper(self):
+        self._stop.set()
@@ -0,0 +1,169 @@
+"""Read queries over the transactions and rollup tables.
+
+A user's history is every row where they are the sender or the receiver.
+Written as ``sender=? OR receiver=?`` SQLite falls back to a full table scan,
+so each query here is a ``UNION ALL`` of two branches that walk the
+``(sender, time)`` and ``(receiver, time)`` indexes.  The receiver branch skips
+rows the user sent so nothing is counted twice.
+
+Amounts are reported on the user's side of each movement: the receiver branch
+reads ``credit_amount``/``credit_currency`` when a transfer was converted.
+HELD and REJECTED rows never moved money and are left out of the history;
+``risk.held`` lists the ones awaiting review.
+"""
+from datetime import date, timedelta
+
+
+def recent_transactions(conn, user_id, limit=10):
+    """Latest ``limit`` rows as (amount, type, description, time, direction, currency)."""
+    return conn.execute("""
+        SELECT amount, type, description, time, direction, currency FROM (
+            SELECT amount, type, description, time, 'sent' AS direction, currency
+            FROM transactions WHERE sender = ? AND status NOT IN ('HELD', 'REJECTED')
+            ORDER BY time DESC LIMIT ?
+        )
+        UNION ALL
+        SELECT amount, type, description, time, direction, currency FROM (
+            SELECT COALESCE(credit_amount, amount) AS amount, type, description, time,
+                   'received' AS direction, COALESCE(credit_currency, currency) AS currency
+            FROM transactions WHERE receiver = ? AND sender IS NOT ? AND status NOT IN ('HELD', 'REJECTED')
+            ORDER BY time DESC LIMIT ?
+        )
+        ORDER BY time DESC LIMIT ?
+    """, (user_id, limit, user_id, user_id, limit, limit)).fetchall()
+
+
+def wallet_summary(conn, user_id, currency="INR"):
+    """Balance and cached counters from one wallet row, as a dict."""
+    row = conn.execute("""
+        SELECT balance, tx_count, lifetime_deposits, lifetime_transfers_out,
+               lifetime_transfers_in
+        FROM wallets WHERE user_id = ? AND currency = ?
+    """, (user_id, currency)).fetchone()
+    keys = ("balance", "tx_count", "lifetime_deposits", "lifetime_transfers_out",
+            "lifetime_transfers_in")
+    return dict(zip(keys, row or (0, 0, 0, 0, 0)))
+
+
+def wallet_balances(conn, user_id):
+    """Every wallet the user holds as (currency, balance), by currency."""
+    return conn.execute("""
+        SELECT currency, balance FROM wallets WHERE user_id = ? ORDER BY currency
+    """, (user_id,)).fetchall()
+
+
+def transaction_page(conn, user_id, after=None, limit=25, tx_type=None, direction=None):
+    """One page of history, newest first, as
+    (id, amount, type, description, time, direction, currency).
+
+    ``after`` is the (time, id) of the last row of the previous page.  Each
+    branch seeks straight to it in its index, so every page costs the same
+    however deep the user has paged.  ``direction`` is "sent", "received" or
+    None for both.
+    """
+    params = {"user_id": user_id, "limit": limit, "type": tx_type}
+    filters = " AND status NOT IN ('HELD', 'REJECTED')"
+    if after is not None:
+        filters += " AND (time, id) < (:after_time, :after_id)"
+        params["after_time"], params["after_id"] = after
+    if tx_type:
+        filters += " AND type = :type"
+
+    branches = []
+    if direction in (None, "sent"):
+        branches.append(f"""
+            SELECT * FROM (
+                SELECT id, amount, type, description, time, 'sent' AS direction, currency
+                FROM transactions WHERE sender = :user_id{filters}
+                ORDER BY time DESC, id DESC LIMIT :limit
+            )""")
+    if direction in (None, "received"):
+        branches.append(f"""
+            SELECT * FROM (
+                SELECT id, COALESCE(credit_amount, amount) AS amount, type, description,
+                       time, 'received' AS direction,
+                       COALESCE(credit_currency, currency) AS currency
+                FROM transactions
+                WHERE receiver = :user_id AND sender IS NOT :user_id{filters}
+                ORDER BY time DESC, id DESC LIMIT :limit
+            )""")
+    sql = " UNION ALL ".join(branches) + " ORDER BY time DESC, id DESC LIMIT :limit"
+    return conn.execute(sql, params).fetchall()
+
+
+def transaction_count(conn, user_id):
+    return conn.execute("""
+        SELECT (SELECT COUNT(*) FROM transactions WHERE sender = ? AND status NOT IN ('HELD', 'REJECTED'))
+             + (SELECT COUNT(*) FROM transactions
+                WHERE receiver = ? AND sender IS NOT ? AND status NOT IN ('HELD', 'REJECTED'))
+    """, (user_id, user_id, user_id)).fetchone()[0]
+
+
+def daily_totals(conn, user_id, currency="INR"):
+    """(date, type, total, count) for every day the wallet has activity, oldest first."""
+    return conn.execute("""
+        SELECT day, type, total, count FROM daily_user_totals
+        WHERE user_id = ? AND currency = ?
+        ORDER BY day
+    """, (user_id, currency)).fetchall()
+
+
+def monthly_deposits(conn, user_id, today=None, currency="INR"):
+    """Total deposited into the user's wallet in the current calendar month."""
+    today = today or date.today()
+    start = today.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return conn.execute("""
+        SELECT COALESCE(SUM(total), 0) FROM daily_user_totals
+        WHERE user_id = ? AND currency = ? AND type = 'DEPOSIT' AND day >= ? AND day < ?
+    """, (user_id, currency, start.isoformat(), end.isoformat())).fetchone()[0]
+
+
+def statement_rows(conn, user_id, start_date, end_date, chunk=1000):
+    """Yield (time, type, amount, description, direction, currency) between two
+    dates inclusive, newest first.
+
+    Rows are pulled from the cursor ``chunk`` at a time, so a multi-year
+    statement never sits in memory all at once.  The connection must stay
+    checked out until the generator is exhausted.
+    """
+    # Compare the ISO timestamps directly so the range can use the index
+    start = start_date.isoformat()
+    end = (end_date + timedelta(days=1)).isoformat()
+    cur = conn.execute("""
+        SELECT time, type, amount, description, 'sent' AS direction, currency
+        FROM transactions
+        WHERE sender = ? AND time >= ? AND time < ? AND status NOT IN ('HELD', 'REJECTED')
+        UNION ALL
+        SELECT time, type, COALESCE(credit_amount, amount), description, 'received',
+               COALESCE(credit_currency, currency)
+        FROM transactions
+        WHERE receiver = ? AND sender IS NOT ? AND time >= ? AND time < ? AND status NOT IN ('HELD', 'REJECTED')
+        ORDER BY time DESC
+    """, (user_id, start, end, user_id, user_id, start, end))
+    try:
+        while True:
+            rows = cur.fetchmany(chunk)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cur.close()
+
+
+def transaction_amounts(conn, user_id):
+    """Every amount in the user's history as (amounts, currencies, directions) lists.
+
+    Columnar so callers can hand the amounts straight to NumPy.
+    """
+    rows = conn.execute("""
+        SELECT amount, currency, 'sent' FROM transactions WHERE sender = ? AND status NOT IN ('HELD', 'REJECTED')
+        UNION ALL
+        SELECT COALESCE(credit_amount, amount), COALESCE(credit_currency, currency), 'received'
+        FROM transactions
+        WHERE receiver = ? AND sender IS NOT ? AND status NOT IN ('HELD', 'REJECTED')
+    """, (user_id, user_id, user_id)).fetchall()
+    if not rows:
+        return [], [], []
+    amounts, currencies, directions = zip(*rows)
+    return list(amounts), list(currencies), list(directions)
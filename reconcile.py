@@ -0,0 +1,164 @@
+"""Incremental ledger reconciliation for United Union Bank.
+
+``ledger.post`` writes every movement as balanced journal lines and moves the
+wallet balances by exactly those lines.  ``Reconciler`` proves that held, but
+only for the journal entries written since its last checkpoint:
+
+* every movement's lines still sum to zero in each currency, and
+* for each wallet those entries touched, the balance at the checkpoint
+  (``reconciled_balances``) plus the new lines equals ``wallets.balance``.
+
+Both checks read one consistent WAL snapshot and walk a primary-key range of
+``journal_entries``, so a run costs time proportional to the new entries, not
+to the size of the ledger.  ``run_once(full=True)`` re-derives every wallet
+from the whole journal instead.
+
+    python reconcile.py            # one incremental run
+    python reconcile.py --full     # rescan everything
+"""
+import argparse
+import json
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+import database
+from ledger import WALLET, immediate
+from workers import start_periodic
+
+RECONCILE_INTERVAL = 60
+MAX_DETAILS = 100
+
+
+class ReconciliationConflict(Exception):
+    """Raised when another reconciler moved the checkpoint during a run."""
+
+
+class Reconciler:
+    """``connection`` is a zero-argument callable returning a context manager
+    that yields a sqlite3 connection, e.g. ``ConnectionPool.connection``.
+    """
+
+    def __init__(self, connection, interval=RECONCILE_INTERVAL):
+        self.connection = connection
+        self.interval = interval
+        self.last_run = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def run_once(self, full=False):
+        """Check the new journal entries and advance the checkpoint.
+
+        Returns a summary dict; ``mismatches`` lists every unbalanced movement
+        and every wallet whose balance disagrees with the journal.
+        """
+        started = time.perf_counter()
+        started_at = datetime.now().isoformat()
+        with self.connection() as conn:
+            # One read transaction: the journal and the wallets it is compared
+            # with come from the same snapshot, so in-flight postings never
+            # show up half-applied.
+            conn.execute("BEGIN")
+            try:
+                last = conn.execute(
+                    "SELECT last_entry_id FROM reconciliation_state").fetchone()[0]
+                first = 0 if full else last
+                upto = conn.execute("SELECT COALESCE(MAX(id), 0) FROM journal_entries").fetchone()[0]
+                entries = upto - first
+                unbalanced = conn.execute("""
+                    SELECT tx_id, currency, SUM(amount) FROM journal_entries
+                    WHERE id > ? AND id <= ?
+                    GROUP BY tx_id, currency HAVING SUM(amount) != 0
+                """, (first, upto)).fetchall()
+                wallets = self._wallets(conn, first, upto, full)
+            finally:
+                conn.rollback()
+
+            mismatches = [{"tx_id": tx_id, "currency": code, "imbalance": total}
+                          for tx_id, code, total in unbalanced]
+            mismatches += [{"user_id": user_id, "currency": code, "journal": expected,
+                            "wallet": actual}
+                           for user_id, code, expected, actual in wallets if expected != actual]
+
+            with immediate(conn):
+                cur = conn.execute("""
+                    UPDATE reconciliation_state SET last_entry_id = ?, checked_at = ?
+                    WHERE last_entry_id = ?
+                """, (upto, started_at, last))
+                if cur.rowcount != 1:
+                    raise ReconciliationConflict("Checkpoint moved during reconciliation")
+                # The journal is the source of truth for the next checkpoint
+                conn.executemany("""
+                    INSERT INTO reconciled_balances (user_id, currency, balance) VALUES (?, ?, ?)
+                    ON CONFLICT (user_id, currency) DO UPDATE SET balance = excluded.balance
+                """, [(user_id, code, expected) for user_id, code, expected, _ in wallets])
+                conn.execute("""
+                    INSERT INTO reconciliation_runs
+                    (started_at, finished_at, first_entry_id, last_entry_id, entries,
+                     wallets_checked, mismatches, details)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (started_at, datetime.now().isoformat(), first, upto, entries,
+                      len(wallets), len(mismatches), json.dumps(mismatches[:MAX_DETAILS])))
+
+        self.last_run = {
+            "first_entry_id": first,
+            "last_entry_id": upto,
+            "entries": entries,
+            "wallets_checked": len(wallets),
+            "mismatches": mismatches,
+            "elapsed_ms": (time.perf_counter() - started) * 1000,
+        }
+        return self.last_run
+
+    @staticmethod
+    def _wallets(conn, first, upto, full):
+        """(user_id, currency, journal balance, wallet balance) per wallet to check."""
+        if full:
+            # Every wallet, including ones with no journal lines at all
+            return conn.execute("""
+                SELECT w.user_id, w.currency, COALESCE(j.total, 0), w.balance
+                FROM wallets w LEFT JOIN (
+                    SELECT user_id, currency, SUM(amount) AS total FROM journal_entries
+                    WHERE id <= ? AND account = ? GROUP BY user_id, currency
+                ) j USING (user_id, currency)
+            """, (upto, WALLET)).fetchall()
+        return conn.execute("""
+            SELECT d.user_id, d.currency, COALESCE(r.balance, 0) + d.delta,
+                   COALESCE(w.balance, 0)
+            FROM (
+                SELECT user_id, currency, SUM(amount) AS delta FROM journal_entries
+                WHERE id > ? AND id <= ? AND account = ?
+                GROUP BY user_id, currency
+            ) d
+            LEFT JOIN reconciled_balances r USING (user_id, currency)
+            LEFT JOIN wallets w USING (user_id, currency)
+        """, (first, upto, WALLET)).fetchall()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = start_periodic("reconciler", self.interval, self._stop, self.run_once)
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile wallet balances against the journal")
+    parser.add_argument("--db", default=database.DB_PATH)
+    parser.add_argument("--full", action="store_true", help="Rescan the whole journal")
+    args = parser.parse_args()
+
+    conn = database.connect(args.db)
+    database.migrate(conn)
+    summary = Reconciler(lambda: nullcontext(conn)).run_once(full=args.full)
+    print(f"entries {summary['first_entry_id']}..{summary['last_entry_id']} "
+          f"({summary['entries']:,}) wallets={summary['wallets_checked']:,} "
+          f"mismatches={len(summary['mismatches'])} in {summary['elapsed_ms']:.1f}ms")
+    for mismatch in summary["mismatches"][:20]:
+        print(f"  {mismatch}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""Real-time risk scoring for United Union Bank.
+
+``RiskScorer`` scores every transfer and deposit before it is posted, from
+features of the user's own recent activity:
+
+* count and INR amount over the last minute, hour and 24 hours,
+* whether a transfer goes to someone the user has never paid, and
+* the z-score of the (log) amount against the user's history.
+
+Each (user, type) keeps its last ``HISTORY`` movements in a NumPy ring buffer
+and running log-amount statistics, loaded from ``transactions`` the first
+time the user is seen and again every ``RELOAD_SECONDS`` (so movements
+other processes post or release are picked up), so scoring rarely queries
+the database.  At most ``MAX_PROFILES`` are kept, least recently used
+first out.  A score of
+``FLAG_SCORE`` posts the movement as FLAGGED; ``HOLD_SCORE`` records it as
+HELD and leaves it for review:
+
+    python risk.py held
+    python risk.py release 1234
+    python risk.py reject 1234
+"""
+import argparse
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from datetime import datetime
+
+import numpy as np
+
+import currency
+import database
+import ledger
+from ledger import BASE_CURRENCY, COMPLETED, FLAGGED, HELD
+from limits import Limiter
+
+WINDOWS = {"1m": 60, "1h": 3600, "24h": 86400}
+HISTORY = 256
+# Rows read to seed the amount statistics of a user seen for the first time
+SEED_ROWS = 1000
+MIN_HISTORY = 5
+# Floor on the log-amount deviation, so a user who always pays the same
+# amount is not flagged for a small change
+MIN_STD = 0.25
+RELOAD_SECONDS = 300
+MAX_PROFILES = 10_000
+
+FLAG_SCORE, HOLD_SCORE = 40, 70
+HIGH_VALUE_HOUR = ledger.to_minor(100_000)
+
+
+class _Profile:
+    """One user's recent movements of one type."""
+
+    __slots__ = ("times", "amounts", "pos", "count", "mean", "m2", "recipients", "loaded_at")
+
+    def __init__(self, loaded_at=0.0):
+        self.loaded_at = loaded_at
+        self.times = np.full(HISTORY, -np.inf)
+        self.amounts = np.zeros(HISTORY)
+        self.pos = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.recipients = set()
+
+    def seed(self, times, amounts, receivers):
+        """Load history given newest first."""
+        recent = min(len(times), HISTORY)
+        self.times[:recent] = times[:recent][::-1]
+        self.amounts[:recent] = amounts[:recent][::-1]
+        self.pos = recent % HISTORY
+        logs = np.log1p(amounts)
+        self.count = len(logs)
+        if self.count:
+            self.mean = float(logs.mean())
+            self.m2 = float(((logs - self.mean) ** 2).sum())
+        self.recipients.update(r for r in receivers if r is not None)
+
+    def add(self, when, amount, receiver):
+        self.times[self.pos] = when
+        self.amounts[self.pos] = amount
+        self.pos = (self.pos + 1) % HISTORY
+        # Welford's update of the log-amount mean and variance
+        x = math.log1p(amount)
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if receiver is not None:
+            self.recipients.add(receiver)
+
+    def features(self, now, amount, receiver):
+        ages = now - self.times
+        features = {}
+        for name, seconds in WINDOWS.items():
+            mask = ages < seconds
+            features[f"count_{name}"] = int(np.count_nonzero(mask))
+            features[f"amount_{name}"] = int(self.amounts @ mask)
+        z = 0.0
+        if self.count >= MIN_HISTORY:
+            std = max(math.sqrt(self.m2 / (self.count - 1)), MIN_STD)
+            z = (math.log1p(amount) - self.mean) / std
+        features["z"] = round(z, 2)
+        features["new_recipient"] = receiver is not None and receiver not in self.recipients
+        return features
+
+
+def score(trans_type, amount, features):
+    """(score, reasons) for a movement of ``amount`` INR minor units."""
+    points, reasons = 0, []
+
+    def hit(value, reason):
+        nonlocal points
+        points += value
+        reasons.append(reason)
+
+    if features["count_1m"] >= 3:
+        hit(30, f"{features['count_1m']} {trans_type.lower()}s in the last minute")
+    if features["count_1h"] >= 10:
+        hit(20, f"{features['count_1h']} {trans_type.lower()}s in the last hour")
+    if features["count_24h"] >= 30:
+        hit(15, f"{features['count_24h']} {trans_type.lower()}s in the last 24 hours")
+    if features["z"] >= 3:
+        hit(35, f"Amount far above usual (z={features['z']})")
+    elif features["z"] >= 2:
+        hit(15, f"Amount above usual (z={features['z']})")
+    if features["new_recipient"]:
+        hit(15, "First payment to this recipient")
+        if features["z"] >= 2:
+            hit(20, "Unusually large first payment")
+    if features["amount_1h"] + amount >= HIGH_VALUE_HOUR:
+        hit(20, "More than Rs. 1,00,000 within an hour")
+    return min(points, 100), reasons
+
+
+class RiskScorer:
+    """``connection`` is a zero-argument callable returning a context manager
+    that yields a sqlite3 connection, used to load a user's history the
+    first time they are scored.
+    """
+
+    def __init__(self, connection, flag_score=FLAG_SCORE, hold_score=HOLD_SCORE):
+        self.connection = connection
+        self.flag_score = flag_score
+        self.hold_score = hold_score
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self, user_id, trans_type, rates):
+        """A profile seeded from the stored history; runs without the lock held."""
+        profile = _Profile(time.monotonic())
+        if trans_type == "TRANSFER":
+            sql = ("SELECT time, amount, currency, receiver FROM transactions "
+                   "WHERE sender = ? AND type = 'TRANSFER' "
+                   "AND status NOT IN ('HELD', 'REJECTED') ORDER BY time DESC LIMIT ?")
+        else:
+            sql = ("SELECT time, amount, currency, NULL FROM transactions "
+                   "WHERE receiver = ? AND sender IS NULL AND type = 'DEPOSIT' "
+                   "AND status NOT IN ('HELD', 'REJECTED') ORDER BY time DESC LIMIT ?")
+        with self.connection() as conn:
+            rows = conn.execute(sql, (user_id, SEED_ROWS)).fetchall()
+            if trans_type == "TRANSFER":
+                # Every recipient ever paid, not just the recent ones
+                receivers = [r for (r,) in conn.execute(
+                    "SELECT DISTINCT receiver FROM transactions "
+                    "WHERE sender = ? AND status NOT IN ('HELD', 'REJECTED')",
+                    (user_id,))]
+            else:
+                receivers = []
+        if rows:
+            times = np.array([datetime.fromisoformat(t).timestamp() for t, _, _, _ in rows])
+            amounts = np.array([a for _, a, _, _ in rows], dtype=np.float64)
+            codes = [c or BASE_CURRENCY for _, _, c, _ in rows]
+            if rates is not None and any(c != BASE_CURRENCY for c in codes):
+                amounts = rates.convert(amounts, codes, BASE_CURRENCY)
+            profile.seed(times, amounts, receivers)
+        return profile
+
+    def assess(self, user_id, trans_type, amount, currency=BASE_CURRENCY, rates=None,
+               receiver=None, now=None):
+        """Score a movement before it is posted.
+
+        ``amount`` is in minor units of ``currency``, valued in INR with
+        ``rates`` when it is another currency.  Returns the assessment dict
+        for ``persist`` and ``observe``; its ``status`` is COMPLETED, FLAGGED
+        or HELD.
+        """
+        if currency != BASE_CURRENCY:
+            if rates is None:
+                raise ledger.LedgerError("Exchange rates are required to score a foreign amount")
+            amount = round(amount * rates.rate(currency, BASE_CURRENCY))
+        now = now or time.time()
+        key = (user_id, trans_type)
+        with self._lock:
+            profile = self._profiles.get(key)
+        loaded = None
+        if profile is None or time.monotonic() - profile.loaded_at >= RELOAD_SECONDS:
+            loaded = self._load(user_id, trans_type, rates)
+        with self._lock:
+            if loaded is not None:
+                profile = self._profiles[key] = loaded
+            elif key not in self._profiles:
+                # Evicted since the lookup
+                self._profiles[key] = profile
+            self._profiles.move_to_end(key)
+            while len(self._profiles) > MAX_PROFILES:
+                self._profiles.popitem(last=False)
+            features = profile.features(now, amount, receiver)
+        points, reasons = score(trans_type, amount, features)
+        status = HELD if points >= self.hold_score else \
+            FLAGGED if points >= self.flag_score else COMPLETED
+        return {"user_id": user_id, "trans_type": trans_type, "amount": amount,
+                "receiver": receiver, "time": now, "score": points, "status": status,
+                "reasons": reasons, "features": features}
+
+    @staticmethod
+    def persist(conn, tx_id, assessment):
+        """Keep the score of a FLAGGED or HELD movement.  Must run inside its transaction."""
+        if assessment["status"] == COMPLETED:
+            return
+        conn.execute("""
+            INSERT INTO risk_assessments (tx_id, score, reasons, features, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (tx_id, assessment["score"], json.dumps(assessment["reasons"]),
+              json.dumps(assessment["features"]), datetime.now().isoformat()))
+
+    def observe(self, assessment):
+        """Add a posted movement to the user's history.
+
+        A HELD movement is skipped: it joins the history only if released,
+        so a rejected one never makes its recipient look familiar.
+        """
+        if assessment["status"] == HELD:
+            return
+        with self._lock:
+            profile = self._profiles.get((assessment["user_id"], assessment["trans_type"]))
+            if profile is not None:
+                profile.add(assessment["time"], assessment["amount"], assessment["receiver"])
+
+
+# ---------------- REVIEW ----------------
+def held(conn, user_id=None, limit=100):
+    """HELD movements, oldest first, as (tx_id, time, type, sender, receiver,
+    amount, currency, score, reasons); only those ``user_id`` initiated if given.
+    """
+    rows = conn.execute("""
+        SELECT t.id, t.time, t.type, t.sender, t.receiver, t.amount, t.currency,
+               r.score, r.reasons
+        FROM transactions t LEFT JOIN risk_assessments r ON r.tx_id = t.id
+        WHERE t.status = :status AND (:user IS NULL OR COALESCE(t.sender, t.receiver) = :user)
+        ORDER BY t.time LIMIT :limit
+    """, {"status": HELD, "user": user_id, "limit": limit}).fetchall()
+    return [(*row[:-1], json.loads(row[-1] or "[]")) for row in rows]
+
+
+def review(conn, tx_id, approve, limits=None, rates=None, scorer=None):
+    """Release (``approve``) or reject a HELD movement in one transaction.
+
+    A held transfer did not count against its sender's limits; once released
+    it is counted on ``limits`` (a ``limits.Limiter``), valued with ``rates``
+    when foreign, without being refused for them.  A released movement also
+    joins its user's history on ``scorer``, a ``RiskScorer``.  Raises
+    ``LedgerError`` before anything is written when either needs ``rates``
+    and none were given.
+    """
+    reservation = None
+    try:
+        with ledger.immediate(conn):
+            if not approve:
+                ledger.reject(conn, tx_id)
+                return
+            row = conn.execute(
+                "SELECT sender, receiver, type, amount, currency, time FROM transactions WHERE id = ?",
+                (tx_id,)).fetchone()
+            ledger.release(conn, tx_id)
+            sender, receiver, trans_type, amount, code, when = row
+            inr = amount
+            if code != BASE_CURRENCY and (limits is not None or scorer is not None):
+                if rates is None:
+                    raise ledger.LedgerError("Exchange rates are required to release a foreign amount")
+                inr = round(amount * rates.rate(code, BASE_CURRENCY))
+            if limits is not None and trans_type == "TRANSFER":
+                reservation = limits.reserve(sender, amount, code, rates, check=False)
+                limits.persist(conn, reservation)
+    except BaseException:
+        if reservation is not None:
+            limits.release(reservation)
+        raise
+    if reservation is not None:
+        limits.settle(reservation)
+    if scorer is not None:
+        transfer = trans_type == "TRANSFER"
+        scorer.observe({"user_id": sender if transfer else receiver, "trans_type": trans_type,
+                        "amount": inr, "receiver": receiver if transfer else None,
+                        "time": datetime.fromisoformat(when).timestamp(), "status": COMPLETED})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Review transactions held by the risk scorer")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("held", help="List held transactions")
+    for command in ("release", "reject"):
+        sub.add_parser(command, help=f"{command.title()} a held transaction").add_argument(
+            "tx_id", type=int)
+    parser.add_argument("--db", default=database.DB_PATH)
+    args = parser.parse_args()
+
+    conn = database.connect(args.db)
+    database.migrate(conn)
+    if args.command == "held":
+        for tx_id, when, kind, sender, receiver, amount, code, points, reasons in held(conn):
+            print(f"#{tx_id} {when[:19]} {kind} {sender}->{receiver} "
+                  f"{ledger.to_major(amount):,.2f} {code} score={points}: {'; '.join(reasons)}")
+    else:
+        review(conn, args.tx_id, approve=args.command == "release",
+               limits=Limiter(lambda: nullcontext(conn)), rates=currency.load(conn))
+        print(f"Transaction {args.tx_id} {args.command.removesuffix('e')}ed")
+
+
+if __name__ == "__main__":
+    main()
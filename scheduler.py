@@ -0,0 +1,266 @@
+"""Standing orders for United Union Bank.
+
+A standing order is a row in ``scheduled_transfers`` that repeats a transfer
+ONCE, DAILY, WEEKLY or MONTHLY.  ``Scheduler`` runs on a background thread and
+takes due orders from the ``(status, next_run_at)`` index in batches, so each
+pass reads only the orders it executes, however many are scheduled.  A batch
+runs in one ``BEGIN IMMEDIATE`` transaction: every order goes through
+``ledger.post_transfer`` (the body of ``ledger.transfer``) under its own
+savepoint, so an order that fails for insufficient funds or its sender's
+transfer limits is rolled back alone and recorded on its row while the rest
+of the batch commits.  Every run is scored like a transfer made by hand; one
+the scorer holds is recorded HELD and waits for review.
+
+    python scheduler.py            # run everything due now and exit
+"""
+import argparse
+import calendar
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+import currency
+import database
+import ledger
+from limits import Limiter
+from risk import RiskScorer
+from workers import start_periodic
+
+ONCE, DAILY, WEEKLY, MONTHLY = "ONCE", "DAILY", "WEEKLY", "MONTHLY"
+FREQUENCIES = [ONCE, DAILY, WEEKLY, MONTHLY]
+
+ACTIVE, DONE, CANCELLED = "ACTIVE", "DONE", "CANCELLED"
+COMPLETED, FAILED, HELD = "COMPLETED", "FAILED", ledger.HELD
+
+BATCH_SIZE = 500
+POLL_INTERVAL = 30
+# Monthly orders keep their day of the month, so it must exist in every month
+MAX_MONTHLY_DAY = 28
+
+
+class ScheduleError(Exception):
+    """Raised when a standing order cannot be created."""
+
+
+def advance(when, frequency):
+    """The run after ``when`` for a repeating order."""
+    if frequency == DAILY:
+        return when + timedelta(days=1)
+    if frequency == WEEKLY:
+        return when + timedelta(weeks=1)
+    if frequency == MONTHLY:
+        year, month = (when.year + 1, 1) if when.month == 12 else (when.year, when.month + 1)
+        day = min(when.day, calendar.monthrange(year, month)[1])
+        return when.replace(year=year, month=month, day=day)
+    raise ValueError(f"Unknown frequency: {frequency}")
+
+
+def create(conn, user_id, receiver_id, amount, frequency, first_run, description="",
+           currency_code=ledger.BASE_CURRENCY, to_currency=None):
+    """Store a standing order and return its id.  Commits.
+
+    ``amount`` is in minor units of ``currency_code``; the receiver is paid in
+    ``to_currency`` (default: the same currency) at the rate of each run.
+    """
+    if frequency not in FREQUENCIES:
+        raise ScheduleError(f"Unknown frequency: {frequency}")
+    if not isinstance(amount, int) or amount <= 0:
+        raise ScheduleError("Amount must be a positive number of minor units")
+    if receiver_id == user_id:
+        raise ScheduleError("Cannot schedule a transfer to yourself")
+    if frequency == MONTHLY and first_run.day > MAX_MONTHLY_DAY:
+        raise ScheduleError(f"Monthly orders must run on day {MAX_MONTHLY_DAY} or earlier")
+    cur = conn.execute("""
+        INSERT INTO scheduled_transfers
+        (user_id, receiver, amount, currency, to_currency, description, frequency, status,
+         next_run_at, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (user_id, receiver_id, amount, currency_code, to_currency or currency_code, description,
+          frequency, ACTIVE, first_run.isoformat(), datetime.now().isoformat()))
+    conn.commit()
+    return cur.lastrowid
+
+
+def cancel(conn, user_id, order_id):
+    """Cancel one of ``user_id``'s active orders; returns whether it was found."""
+    cur = conn.execute("UPDATE scheduled_transfers SET status=? WHERE id=? AND user_id=? AND status=?",
+                       (CANCELLED, order_id, user_id, ACTIVE))
+    conn.commit()
+    return cur.rowcount == 1
+
+
+def list_orders(conn, user_id):
+    """The user's active orders, next due first, as (id, recipient, amount,
+    currency, description, frequency, next_run_at, runs, failures, last_status, last_error).
+    """
+    return conn.execute("""
+        SELECT s.id, COALESCE(NULLIF(u.full_name, ''), u.username), s.amount, s.currency, s.description,
+               s.frequency, s.next_run_at, s.runs, s.failures, s.last_status, s.last_error
+        FROM scheduled_transfers s LEFT JOIN users u ON u.id = s.receiver
+        WHERE s.user_id = ? AND s.status = ?
+        ORDER BY s.next_run_at
+    """, (user_id, ACTIVE)).fetchall()
+
+
+class Scheduler:
+    """``connection`` is a zero-argument callable returning a context manager
+    that yields a sqlite3 connection, e.g. ``ConnectionPool.connection``.
+
+    ``limits`` is an optional ``limits.Limiter`` every run is counted against
+    and ``risk`` an optional ``risk.RiskScorer`` every run is scored by, as
+    ``ledger.transfer`` does for a transfer made by hand.  ``on_posted`` is
+    called after each batch commits with the ids of the users whose wallets
+    it changed, e.g. to drop their cached balances.
+    """
+
+    def __init__(self, connection, batch_size=BATCH_SIZE, poll_interval=POLL_INTERVAL,
+                 limits=None, risk=None, on_posted=None):
+        self.connection = connection
+        self.limits = limits
+        self.risk = risk
+        self.on_posted = on_posted
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.last_run = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def run_once(self, now=None):
+        """Execute one batch of due orders; return how many were taken."""
+        now = now or datetime.now()
+        stamp = now.isoformat()
+        started = time.perf_counter()
+        completed = failed = held = 0
+        reservations, assessments = [], []
+        changed = set()
+        try:
+            with self.connection() as conn, ledger.immediate(conn):
+                orders = conn.execute("""
+                    SELECT id, user_id, receiver, amount, currency, to_currency, description,
+                           frequency, next_run_at FROM scheduled_transfers
+                    WHERE status = ? AND next_run_at <= ?
+                    ORDER BY next_run_at LIMIT ?
+                """, (ACTIVE, stamp, self.batch_size)).fetchall()
+                rates = None
+                updates = []
+                for (order_id, sender, receiver, amount, code, to_code, description,
+                     frequency, next_run_at) in orders:
+                    checked = self.limits is not None or self.risk is not None
+                    foreign = to_code != code or (checked and code != ledger.BASE_CURRENCY)
+                    if foreign and rates is None:
+                        rates = currency.load(conn)
+                    reservation = assessment = None
+                    tx_status = ledger.COMPLETED
+                    conn.execute("SAVEPOINT standing_order")
+                    try:
+                        if self.limits is not None:
+                            reservation = self.limits.reserve(sender, amount, code, rates,
+                                                              now.timestamp())
+                        if self.risk is not None:
+                            assessment = self.risk.assess(sender, "TRANSFER", amount, code, rates,
+                                                          receiver, now.timestamp())
+                            tx_status = assessment["status"]
+                        if tx_status == ledger.HELD and reservation is not None:
+                            # Counted against the limits only if it is released
+                            self.limits.release(reservation)
+                            reservation = None
+                        tx_id = ledger.post_transfer(conn, sender, receiver, amount, description,
+                                                     stamp, code, to_code, rates, tx_status)
+                        if reservation is not None:
+                            self.limits.persist(conn, reservation)
+                        if assessment is not None:
+                            self.risk.persist(conn, tx_id, assessment)
+                    except (ledger.LedgerError, currency.RateError) as exc:
+                        conn.execute("ROLLBACK TO standing_order")
+                        if reservation is not None:
+                            self.limits.release(reservation)
+                        tx_id, outcome, error = None, FAILED, str(exc)
+                        failed += 1
+                    else:
+                        if reservation is not None:
+                            reservations.append(reservation)
+                        if assessment is not None:
+                            assessments.append(assessment)
+                        if tx_status == ledger.HELD:
+                            outcome, error = HELD, "Held for review"
+                            held += 1
+                        else:
+                            outcome, error = COMPLETED, None
+                            completed += 1
+                            changed.update((sender, receiver))
+                    conn.execute("RELEASE standing_order")
+
+                    # A missed run is not made up: the order moves to its next slot after now
+                    if frequency == ONCE:
+                        status, upcoming = DONE, next_run_at
+                    else:
+                        status, upcoming = ACTIVE, datetime.fromisoformat(next_run_at)
+                        while upcoming <= now:
+                            upcoming = advance(upcoming, frequency)
+                        upcoming = upcoming.isoformat()
+                    updates.append((status, upcoming, outcome == FAILED, stamp, outcome, error,
+                                    tx_id, order_id))
+                conn.executemany("""
+                    UPDATE scheduled_transfers SET status = ?, next_run_at = ?, runs = runs + 1,
+                        failures = failures + ?, last_run_at = ?, last_status = ?, last_error = ?,
+                        last_tx_id = COALESCE(?, last_tx_id)
+                    WHERE id = ?
+                """, updates)
+        except BaseException:
+            # The batch rolled back, so none of its runs count against a limit
+            if reservations:
+                self.limits.release(*reservations)
+            raise
+        if reservations:
+            self.limits.settle(*reservations)
+        for assessment in assessments:
+            self.risk.observe(assessment)
+        if changed and self.on_posted is not None:
+            self.on_posted(changed)
+
+        if orders:
+            self.last_run = {
+                "completed": completed,
+                "failed": failed,
+                "held": held,
+                "elapsed_ms": (time.perf_counter() - started) * 1000,
+            }
+        return len(orders)
+
+    def drain(self, now=None):
+        """Run batches until nothing is due; return the number of orders taken."""
+        total = 0
+        while True:
+            taken = self.run_once(now)
+            total += taken
+            if taken < self.batch_size:
+                return total
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = start_periodic("scheduler", self.poll_interval, self._stop, self.drain)
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Execute the standing orders that are due")
+    parser.add_argument("--db", default=database.DB_PATH)
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    conn = database.connect(args.db)
+    database.migrate(conn)
+    scheduler = Scheduler(lambda: nullcontext(conn), batch_size=args.batch,
+                          limits=Limiter(lambda: nullcontext(conn)),
+                          risk=RiskScorer(lambda: nullcontext(conn)))
+    started = time.perf_counter()
+    taken = scheduler.drain()
+    print(f"orders={taken:,} in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""PDF and CSV account statements for United Union Bank.
+
+The renderers consume an iterator of rows (see ``queries.statement_rows``) and
+return the finished document as bytes, so nothing is written to the working
+directory and concurrent users cannot collide on a file name.
+"""
+import csv
+import io
+import unicodedata
+from datetime import datetime
+
+from fpdf import FPDF
+
+from ledger import to_major
+
+# The core PDF fonts only cover Latin-1
+_PDF_REPLACEMENTS = str.maketrans({"₹": "Rs.", "‘": "'", "’": "'", "“": '"', "”": '"',
+                                   "–": "-", "—": "-", "…": "..."})
+
+
+def _pdf_text(text):
+    """``text`` reduced to Latin-1 for the core fonts: accents outside it are
+    dropped from their letter, and anything else left becomes "?".
+    """
+    chars = []
+    for char in str(text).translate(_PDF_REPLACEMENTS):
+        if ord(char) > 0xFF:
+            char = "".join(c for c in unicodedata.normalize("NFKD", char)
+                           if not unicodedata.combining(c))
+            char = char if char and all(ord(c) <= 0xFF for c in char) else "?"
+        chars.append(char)
+    return "".join(chars)
+
+
+def render_statement(user, rows, start_date, end_date):
+    """Return ``(pdf_bytes, row_count)`` for a statement.
+
+    ``user`` is a users row; ``rows`` yields
+    (time, type, amount, description, direction, currency) with amounts in
+    integer minor units.
+    """
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 10, "United Union Bank - Account Statement", ln=True, align='C')
+
+    pdf.set_font("Arial", '', 12)
+    pdf.cell(0, 10, f"Account Holder: {_pdf_text(user[3] or user[1])}", ln=True)
+    pdf.cell(0, 10, f"Account Number: {user[6] or 'N/A'}", ln=True)
+    pdf.cell(0, 10, f"Statement Period: {start_date} to {end_date}", ln=True)
+    pdf.cell(0, 10, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}", ln=True)
+    pdf.ln(10)
+
+    # Table header
+    pdf.set_fill_color(200, 220, 255)
+    pdf.cell(40, 10, "Date", 1, 0, 'C', 1)
+    pdf.cell(30, 10, "Type", 1, 0, 'C', 1)
+    pdf.cell(60, 10, "Description", 1, 0, 'C', 1)
+    pdf.cell(40, 10, "Amount", 1, 1, 'C', 1)
+
+    # Table rows.  The core PDF fonts have no rupee glyph, so amounts use "Rs."
+    # and other currencies their ISO code
+    pdf.set_fill_color(245, 245, 245)
+    fill = False
+    count = 0
+    for tx_time, tx_type, amount, description, direction, currency in rows:
+        fill = not fill
+        count += 1
+        sign = "+" if direction == "received" else "-"
+        unit = "Rs." if currency == "INR" else f"{currency} "
+        pdf.cell(40, 10, tx_time[:10], 1, 0, 'C', fill)
+        pdf.cell(30, 10, tx_type, 1, 0, 'C', fill)
+        pdf.cell(60, 10, _pdf_text(description or "-"), 1, 0, 'C', fill)
+        pdf.cell(40, 10, f"{sign}{unit}{to_major(amount):,.2f}", 1, 1, 'R', fill)
+
+    return bytes(pdf.output()), count
+
+
+def render_csv(rows):
+    """Return ``(csv_bytes, row_count)`` for the same rows as ``render_statement``."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["Time", "Type", "Direction", "Description", "Amount", "Currency"])
+    count = 0
+    for tx_time, tx_type, amount, description, direction, currency in rows:
+        count += 1
+        signed = amount if direction == "received" else -amount
+        writer.writerow([tx_time[:19], tx_type, direction, description or "",
+                         f"{to_major(signed):.2f}", currency])
+    return buffer.getvalue().encode("utf-8"), count
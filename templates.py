@@ -0,0 +1,240 @@
+"""HTML and CSS fragments for United Union Bank pages.
+
+Each fragment is compiled once at import: indentation and line breaks are
+stripped (so Markdown never mistakes an indented line for a code block and
+fewer bytes go over the websocket) and the result is a ``string.Template``.
+``render`` HTML-escapes every value unless it is wrapped in ``Markup``, so user
+text such as transaction descriptions cannot inject markup.  Streamlit only
+re-executes the page script, not this module, so the work is paid once per
+process.
+"""
+import html
+import re
+from string import Template as _StringTemplate
+
+
+class Markup(str):
+    """A string that is already safe HTML and must not be escaped again."""
+
+
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_html(source):
+    return re.sub(r">\s+<", "><", re.sub(r"\s*\n\s*", " ", source)).strip()
+
+
+class Template:
+    def __init__(self, source):
+        self._template = _StringTemplate(minify_html(source))
+
+    def render(self, **values):
+        return Markup(self._template.substitute({
+            key: value if isinstance(value, Markup) else html.escape(str(value))
+            for key, value in values.items()
+        }))
+
+    def render_many(self, rows):
+        """Render one fragment per mapping in ``rows`` as a single payload."""
+        return Markup("".join(self.render(**row) for row in rows))
+
+
+# ---------------- STYLESHEET ----------------
+_CSS = """
+    /* Main styling */
+    .main-header {
+        background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
+        padding: 1.5rem;
+        border-radius: 10px;
+        color: white;
+        margin-bottom: 2rem;
+    }
+    
+    .card {
+        background: white;
+        padding: 1.5rem;
+        border-radius: 10px;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+        margin-bottom: 1rem;
+        border-left: 4px solid #1e3c72;
+    }
+    
+    .metric-card {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        padding: 1.5rem;
+        border-radius: 10px;
+        text-align: center;
+    }
+    
+    .success-card {
+        background: linear-gradient(135deg, #00b09b 0%, #96c93d 100%);
+        color: white;
+        padding: 1rem;
+        border-radius: 10px;
+    }
+    
+    .warning-card {
+        background: linear-gradient(135deg, #f46b45 0%, #eea849 100%);
+        color: white;
+        padding: 1rem;
+        border-radius: 10px;
+    }
+    
+    .stButton > button {
+        background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
+        color: white;
+        border: none;
+        padding: 0.5rem 2rem;
+        border-radius: 5px;
+        font-weight: bold;
+        width: 100%;
+    }
+    
+    .stButton > button:hover {
+        background: linear-gradient(135deg, #2a5298 0%, #3a62a8 100%);
+        transform: translateY(-2px);
+        box-shadow: 0 4px 12px rgba(42, 82, 152, 0.3);
+    }
+    
+    /* Transaction list styling */
+    .transaction-positive {
+        background: rgba(0, 200, 83, 0.1);
+        padding: 0.5rem;
+        border-radius: 5px;
+        border-left: 3px solid #00c853;
+        margin: 0.25rem 0;
+    }
+    
+    .transaction-negative {
+        background: rgba(255, 82, 82, 0.1);
+        padding: 0.5rem;
+        border-radius: 5px;
+        border-left: 3px solid #ff5252;
+        margin: 0.25rem 0;
+    }
+    
+    /* OTP display styling */
+    .otp-display {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        padding: 2rem;
+        border-radius: 15px;
+        text-align: center;
+        margin: 2rem 0;
+        border: 3px solid white;
+        box-shadow: 0 10px 30px rgba(0,0,0,0.2);
+    }
+    
+    .otp-number {
+        font-size: 3.5rem;
+        font-weight: bold;
+        letter-spacing: 15px;
+        margin: 1rem 0;
+        font-family: 'Courier New', monospace;
+        text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
+    }
+    
+    .whatsapp-sim {
+        background: #25D366;
+        color: white;
+        padding: 1.5rem;
+        border-radius: 10px;
+        margin: 1rem 0;
+        border-left: 5px solid #128C7E;
+    }
+    
+    /* Hide Streamlit default elements */
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    header {visibility: hidden;}
+    
+    .st-emotion-cache-1y4p8pa {padding: 2rem 1rem;}
+"""
+
+STYLE = Markup(f"<style>{minify_css(_CSS)}</style>")
+
+
+# ---------------- FRAGMENTS ----------------
+LOGO_FALLBACK = Template("""
+    <div style="text-align: center; font-size: ${font_size}px;">🏦</div>
+""")
+
+OTP_DISPLAY = Template("""
+    <div class="otp-display">
+        <h2>🔐 Two-Factor Authentication</h2>
+        <p>Your One-Time Password for United Union Bank</p>
+        <div class="otp-number">${otp}</div>
+        <p>Enter this 6-digit code to continue</p>
+        <p><small>Valid for 5 minutes</small></p>
+    </div>
+""")
+
+WHATSAPP_SIM = Template("""
+    <div class="whatsapp-sim">
+        <h4>📱 WhatsApp Simulation</h4>
+        <div style="background: white; color: #333; padding: 15px; border-radius: 8px; margin: 10px 0;">
+            <strong>From:</strong> United Union Bank<br>
+            <strong>To:</strong> ${phone_number}<br><br>
+            🔐 Your verification code is: <strong>${otp}</strong><br>
+            Valid for 5 minutes.<br><br>
+            ⚠️ Do not share this code with anyone.
+        </div>
+        <small><i>In production, this would be sent via real WhatsApp/SMS</i></small>
+    </div>
+""")
+
+COPY_BUTTON = Template("""
+    <script>
+    function copyToClipboard(text) {
+        navigator.clipboard.writeText(text).then(function() {
+            alert('OTP copied to clipboard: ' + text);
+        }, function(err) {
+            console.error('Could not copy text: ', err);
+        });
+    }
+    </script>
+    <button onclick="copyToClipboard('${otp}')" style="
+        background: linear-gradient(135deg, #25D366 0%, #128C7E 100%);
+        color: white;
+        border: none;
+        padding: 10px 20px;
+        border-radius: 5px;
+        font-size: 16px;
+        cursor: pointer;
+        width: 100%;
+        margin: 10px 0;">
+        📋 Copy OTP to Clipboard
+    </button>
+""")
+
+SIDEBAR_PROFILE = Template("""
+    <div class="card">
+        <h4>👤 ${full_name}</h4>
+        <p>📋 ${account_number}</p>
+        <p>💳 Member Since: ${member_since}</p>
+        <hr>
+    </div>
+""")
+
+TRANSACTION_ROW = Template("""
+    <div class="${css_class}">
+        <strong>${description}</strong><br>
+        <small>${time}</small>
+        <div style="float: right; font-weight: bold;">
+            ${amount}
+        </div>
+    </div>
+""")
+
+CONVERSION_RESULT = Template("""
+    <div style="text-align: center; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    border-radius: 10px; color: white; margin: 20px 0;">
+        <h2>${amount} ${from_code} =</h2>
+        <h1>${converted} ${to_code}</h1>
+    </div>
+""")
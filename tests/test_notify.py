@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+import pytest
+
+import database
+import notify
+from notify import FAILED, PENDING, SENDING, SENT, Dispatcher, FakeProvider, Provider
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / "bank.db")
+    conn = database.connect(path)
+    database.migrate(conn)
+    conn.close()
+    pool = database.ConnectionPool(path)
+    yield pool
+    pool.close()
+
+
+def enqueue(pool, count, kind="alert"):
+    with pool.connection() as conn:
+        return [notify.enqueue(conn, "whatsapp", f"+91{i:010d}", kind, f"message {i}")
+                for i in range(count)]
+
+
+def statuses(pool):
+    with pool.connection() as conn:
+        return conn.execute("SELECT id, status, attempts, last_error FROM notifications "
+                            "ORDER BY id").fetchall()
+
+
+def drain(dispatcher, times):
+    async def run():
+        return [await dispatcher.drain_once() for _ in range(times)]
+    return asyncio.run(run())
+
+
+def test_drains_in_batches(pool):
+    enqueue(pool, 120)
+    provider = FakeProvider(latency=0)
+    dispatcher = Dispatcher(pool.connection, {"whatsapp": provider}, batch_size=50)
+
+    assert drain(dispatcher, 4) == [50, 50, 20, 0]
+    assert len(provider.sent) == 120
+    assert {status for _, status, _, _ in statuses(pool)} == {SENT}
+
+
+def test_delivered_otp_body_is_cleared(pool):
+    enqueue(pool, 1, kind="otp")
+    dispatcher = Dispatcher(pool.connection, {"whatsapp": FakeProvider(latency=0)})
+    drain(dispatcher, 1)
+    with pool.connection() as conn:
+        assert conn.execute("SELECT status, body FROM notifications").fetchone() == (SENT, None)
+
+
+def test_retries_with_backoff_until_failed(pool):
+    (row_id,) = enqueue(pool, 1)
+    provider = FakeProvider(latency=0, failure_rate=1.0)
+    dispatcher = Dispatcher(pool.connection, {"whatsapp": provider}, max_attempts=3)
+
+    async def run():
+        for attempt in (1, 2):
+            assert await dispatcher.drain_once() == 1
+            with pool.connection() as conn:
+                status, attempts, due = conn.execute(
+                    "SELECT status, attempts, next_attempt_at FROM notifications").fetchone()
+                assert (status, attempts) == (PENDING, attempt)
+                # Not retried before its backoff has passed
+                assert due > time.time()
+                assert await dispatcher.drain_once() == 0
+                conn.execute("UPDATE notifications SET next_attempt_at = 0")
+                conn.commit()
+        assert await dispatcher.drain_once() == 1
+        assert await dispatcher.drain_once() == 0
+
+    asyncio.run(run())
+    assert statuses(pool) == [(row_id, FAILED, 3, "RuntimeError: Simulated provider failure")]
+    assert not provider.sent
+
+
+def test_backoff_grows_and_is_capped():
+    for attempts in range(1, 12):
+        delay = min(notify.BACKOFF_MAX, notify.BACKOFF_BASE ** attempts)
+        assert delay / 2 <= notify.backoff(attempts) <= delay
+
+
+def test_unknown_channel_is_retried(pool):
+    enqueue(pool, 1)
+    dispatcher = Dispatcher(pool.connection, {})
+    drain(dispatcher, 1)
+    assert statuses(pool)[0][1:] == (PENDING, 1, "No provider for channel 'whatsapp'")
+
+
+def test_provider_concurrency_is_limited(pool):
+    class CountingProvider(Provider):
+        concurrency = 3
+
+        def __init__(self):
+            self.active = self.peak = self.count = 0
+
+        async def send(self, recipient, body):
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0.01)
+            self.active -= 1
+            self.count += 1
+
+    enqueue(pool, 20)
+    provider = CountingProvider()
+    dispatcher = Dispatcher(pool.connection, {"whatsapp": provider})
+    assert drain(dispatcher, 1) == [20]
+    assert provider.count == 20
+    assert provider.peak == 3
+
+
+def test_start_resumes_rows_left_sending(pool):
+    ids = enqueue(pool, 3)
+    with pool.connection() as conn:
+        conn.execute("UPDATE notifications SET status = ?", (SENDING,))
+        conn.commit()
+    provider = FakeProvider(latency=0)
+    dispatcher = Dispatcher(pool.connection, {"whatsapp": provider}, poll_interval=0.05)
+    dispatcher.start()
+
+    deadline = time.time() + 5
+    while time.time() < deadline and any(status != SENT for _, status, _, _ in statuses(pool)):
+        time.sleep(0.01)
+    assert [status for _, status, _, _ in statuses(pool)] == [SENT] * len(ids)
+    assert len(provider.sent) == len(ids)
+
+
+def test_fake_provider_keeps_only_recent_messages():
+    recent, none = FakeProvider(latency=0, keep=2), FakeProvider(latency=0, keep=0)
+
+    async def run():
+        for i in range(5):
+            await recent.send("+910000000000", f"code {i}")
+            await none.send("+910000000000", f"code {i}")
+
+    asyncio.run(run())
+    assert list(recent.sent) == [("+910000000000", "code 3"), ("+910000000000", "code 4")]
+    assert not none.sent
@@ -0,0 +1,29 @@
+"""Periodic background threads for United Union Bank.
+
+The OTP sweeper, the reconciler, the standing-order scheduler and the job
+purger each call one method periodically on a daemon thread until they are
+stopped.
+``start_periodic`` is that loop.  A failure (the database busy, another
+process winning a race) is logged with its traceback and retried on the next
+tick rather than ending the thread.
+"""
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+
+def start_periodic(name, interval, stop, func):
+    """Call ``func`` every ``interval`` seconds on a daemon thread called
+    ``name`` until the ``stop`` event is set; returns the started thread.
+    """
+    def run():
+        while not stop.wait(interval):
+            try:
+                func()
+            except Exception:
+                log.exception("%s failed; retrying in %ss", name, interval)
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread